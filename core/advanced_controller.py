@@ -4,7 +4,11 @@
 import os
 import time
 import json
+import base64
 import logging
+import functools
+import threading
+import collections
 import subprocess
 from typing import Dict, List, Optional, Tuple, Any, Union
 import tempfile
@@ -17,13 +21,45 @@ from core.device_controller import DeviceController
 
 try:
     # 尝试导入Airtest相关模块
-    from airtest.core.api import connect_device, auto_setup
+    from airtest.core.api import connect_device, auto_setup, set_current
     from airtest.core.api import touch, swipe, snapshot, Template, exists, wait
     from airtest.core.helper import G, logwrap
     from airtest.aircv import cv2_2_pil, crop_image
     AIRTEST_AVAILABLE = True
 except ImportError:
     AIRTEST_AVAILABLE = False
+
+# logcat可选的日志缓冲区（main使用默认缓冲区）
+LOGCAT_BUFFERS = ("events", "radio", "system", "crash")
+
+# 按内容哈希缓存的已解码模板图像数量上限
+TEMPLATE_CACHE_SIZE = 32
+
+# Airtest当前设备(G.DEVICE)为进程全局状态，所有控制器共用一把锁，
+# 使用Airtest的操作在持有锁期间独占当前设备，不会被其他线程的设备切换打断
+_AIRTEST_LOCK = threading.RLock()
+
+
+def _airtest_exclusive(func):
+    """装饰器：持有Airtest全局锁执行方法，并先将Airtest当前设备切换为本控制器的设备"""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with _AIRTEST_LOCK:
+            if self.airtest_initialized:
+                self._set_airtest_current()
+            return func(self, *args, **kwargs)
+    return wrapper
+
+if AIRTEST_AVAILABLE:
+    class _ArrayTemplate(Template):
+        """直接使用内存中图像数据的模板，不经过磁盘读写"""
+        
+        def __init__(self, image: np.ndarray, **kwargs):
+            super().__init__("<memory>", **kwargs)
+            self._image = image
+        
+        def _imread(self):
+            return self._image
     
 try:
     # 尝试导入OCR组件
@@ -57,6 +93,11 @@ class AdvancedController(DeviceController):
         super().__init__(adb_path, device_id)
         self.logger = logging.getLogger("AdvancedController")
         self.airtest_initialized = False
+        
+        # 已解码的模板图像缓存 {内容哈希: 图像数组}
+        self._template_cache = {}
+        self._template_cache_lock = threading.Lock()
+        
         self.init_airtest()
     
     def init_airtest(self) -> bool:
@@ -70,22 +111,48 @@ class AdvancedController(DeviceController):
             self.logger.warning("Airtest不可用，部分高级功能将不可用")
             return False
             
+        with _AIRTEST_LOCK:
+            try:
+                # 使用ADB连接设备
+                device_cmd = f"Android:///{self.device_id}" if self.device_id else "Android:///"
+                connect_device(device_cmd)
+                
+                # 初始化Airtest
+                auto_setup(__file__, logdir=os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs"))
+                
+                self.airtest_initialized = True
+                return True
+            except Exception as e:
+                self.logger.error(f"Airtest初始化失败: {str(e)}")
+                return False
+    
+    def activate_airtest(self) -> bool:
+        """
+        将Airtest当前设备切换为本控制器的设备，已连接过的设备不再重新初始化
+        
+        Returns:
+            是否成功
+        """
+        with _AIRTEST_LOCK:
+            if not self.airtest_initialized:
+                return self.init_airtest()
+            return self._set_airtest_current()
+    
+    def _set_airtest_current(self) -> bool:
+        """将Airtest当前设备设为本控制器的设备，调用方需持有_AIRTEST_LOCK"""
         try:
-            # 使用ADB连接设备
-            device_cmd = f"Android:///{self.device_id}" if self.device_id else "Android:///"
-            connect_device(device_cmd)
-            
-            # 初始化Airtest
-            auto_setup(__file__, logdir=os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs"))
-            
-            self.airtest_initialized = True
+            set_current(self.device_id or 0)
             return True
         except Exception as e:
-            self.logger.error(f"Airtest初始化失败: {str(e)}")
+            self.logger.error(f"切换Airtest设备失败: {str(e)}")
             return False
     
+    @_airtest_exclusive
     def image_recognition(self, target_image_path: str, 
-                          threshold: float = 0.7, timeout: int = 10) -> Optional[Dict[str, Any]]:
+                          threshold: float = 0.7, timeout: int = 10,
+                          save_screenshot: bool = False,
+                          target_image_b64: Optional[str] = None,
+                          target_image_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         图像识别与匹配
         
@@ -93,9 +160,12 @@ class AdvancedController(DeviceController):
             target_image_path: 目标图像路径
             threshold: 匹配阈值，越高越精确
             timeout: 超时时间(秒)
+            save_screenshot: 是否保存匹配时使用的截图，避免调用方再单独截图
+            target_image_b64: base64编码的目标图像数据，提供时忽略target_image_path
+            target_image_hash: 目标图像内容哈希，命中缓存时跳过读取与解码
             
         Returns:
-            匹配结果 {x, y, confidence} 或None表示未找到
+            匹配结果 {x, y, confidence[, screenshot_path]} 或None表示未找到
         """
         if not AIRTEST_AVAILABLE:
             return None
@@ -104,13 +174,35 @@ class AdvancedController(DeviceController):
             if not self.init_airtest():
                 return None
                 
-        if not os.path.exists(target_image_path):
-            self.logger.error(f"目标图像不存在: {target_image_path}")
-            return None
+        image = self._template_cache.get(target_image_hash) if target_image_hash else None
+        
+        if image is None and target_image_b64 is None:
+            # 未命中模板缓存且没有图像数据时，只能从路径读取
+            if not target_image_path:
+                self.logger.error("未提供目标图像，且模板缓存中没有对应哈希的图像")
+                return None
+            if not os.path.exists(target_image_path):
+                self.logger.error(f"目标图像不存在: {target_image_path}")
+                return None
             
         try:
             # 创建模板
-            template = Template(target_image_path, threshold=threshold)
+            if image is None and (target_image_b64 is not None or target_image_hash):
+                if target_image_b64 is not None:
+                    data = np.frombuffer(base64.b64decode(target_image_b64), dtype=np.uint8)
+                else:
+                    data = np.fromfile(target_image_path, dtype=np.uint8)
+                image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+                if image is None:
+                    self.logger.error("目标图像数据无法解码")
+                    return None
+                if target_image_hash:
+                    self._cache_template(target_image_hash, image)
+                    
+            if image is not None:
+                template = _ArrayTemplate(image, threshold=threshold)
+            else:
+                template = Template(target_image_path, threshold=threshold)
             
             # 等待图像出现
             start_time = time.time()
@@ -120,11 +212,18 @@ class AdvancedController(DeviceController):
                 match_pos = template.match_in(screen)
                 
                 if match_pos:
-                    return {
+                    result = {
                         "x": match_pos[0],
                         "y": match_pos[1],
                         "confidence": match_pos[2]["confidence"]
                     }
+                    if save_screenshot:
+                        screenshot_path = os.path.join(
+                            self.screenshot_dir, f"match_{int(time.time() * 1000)}.png"
+                        )
+                        cv2.imwrite(screenshot_path, screen)
+                        result["screenshot_path"] = screenshot_path
+                    return result
                     
                 time.sleep(1)
                 
@@ -133,6 +232,20 @@ class AdvancedController(DeviceController):
             self.logger.error(f"图像识别失败: {str(e)}")
             return None
     
+    def _cache_template(self, key: str, image: np.ndarray):
+        """
+        缓存已解码的模板图像，超出上限时淘汰最早加入的条目
+        
+        Args:
+            key: 图像内容哈希
+            image: 图像数组
+        """
+        with self._template_cache_lock:
+            if key not in self._template_cache and len(self._template_cache) >= TEMPLATE_CACHE_SIZE:
+                self._template_cache.pop(next(iter(self._template_cache)))
+            self._template_cache[key] = image
+    
+    @_airtest_exclusive
     def wait_for_image(self, target_image_path: str, timeout: int = 20, threshold: float = 0.7) -> bool:
         """
         等待图像出现
@@ -167,6 +280,7 @@ class AdvancedController(DeviceController):
             self.logger.error(f"等待图像失败: {str(e)}")
             return False
     
+    @_airtest_exclusive
     def tap_image(self, target_image_path: str, timeout: int = 10, threshold: float = 0.7) -> bool:
         """
         点击图像
@@ -185,6 +299,7 @@ class AdvancedController(DeviceController):
             
         return self.tap(match_pos["x"], match_pos["y"])
     
+    @_airtest_exclusive
     def check_image_exists(self, target_image_path: str, threshold: float = 0.7) -> bool:
         """
         检查图像是否存在
@@ -217,6 +332,7 @@ class AdvancedController(DeviceController):
             self.logger.error(f"检查图像失败: {str(e)}")
             return False
     
+    @_airtest_exclusive
     def local_image_search(self, target_image_path: str, 
                            region: List[int] = None, 
                            threshold: float = 0.7) -> Optional[Dict[str, Any]]:
@@ -338,32 +454,27 @@ class AdvancedController(DeviceController):
         Returns:
             日志内容
         """
-        cmd = f"shell logcat"
+        cmd = "exec-out logcat"
+        
+        # 添加日志类型，main使用logcat默认缓冲区
+        if log_type in LOGCAT_BUFFERS:
+            cmd += f" -b {log_type}"
         
-        # 添加日志类型
-        if log_type != "main":
-            if log_type == "events":
-                cmd += " -b events"
-            elif log_type == "radio":
-                cmd += " -b radio"
-            elif log_type == "system":
-                cmd += " -b system"
-            elif log_type == "crash":
-                cmd += " -b crash"
+        # 按应用进程在设备端过滤，-t限制的是过滤后的行数
+        if package:
+            pid, _, code = self.run_adb_shell(f"pidof -s {package}")
+            pid = pid.strip()
+            if code != 0 or not pid.isdigit():
+                self.logger.warning(f"应用未运行，无法获取日志: {package}")
+                return ""
+            cmd += f" --pid={pid}"
         
         # 添加行数限制
         cmd += f" -d -t {lines}"
         
-        # 添加包名过滤
-        if package:
-            cmd += f" | grep {package}"
-            
-        stdout, stderr, code = self.run_adb_cmd(cmd)
-        if code != 0:
-            self.logger.error(f"获取日志失败: {stderr}")
-            return ""
-            
-        return stdout
+        # 逐行读取，只保留最后lines行
+        tail = collections.deque(self.run_adb_cmd_lines(cmd), maxlen=lines)
+        return "\n".join(tail)
     
     def record_screen(self, duration: int = 10, output_path: str = None) -> str:
         """
@@ -421,8 +532,7 @@ class AdvancedController(DeviceController):
             # 启动录制进程
             cmd = f"shell screenrecord --time-limit {duration} {remote_path}"
             process = subprocess.Popen(
-                self._build_adb_cmd(cmd),
-                shell=True,
+                self._build_adb_argv(cmd),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE
             )
@@ -457,6 +567,7 @@ class AdvancedController(DeviceController):
                 except:
                     pass
     
+    @_airtest_exclusive
     def ui_crawler(self, max_depth: int = 3, max_actions: int = 30) -> Dict[str, Any]:
         """
         自动化UI遍历
@@ -561,17 +672,14 @@ class AdvancedController(DeviceController):
     
     def _get_screen_hash(self, screen) -> str:
         """计算屏幕图像的哈希值"""
-        # 将图像调整为较小尺寸，减少计算量
-        small_screen = cv2.resize(screen, (32, 32))
+        # 按区域平均缩小到32x32，减少计算量
+        small_screen = cv2.resize(screen, (32, 32), interpolation=cv2.INTER_AREA)
         # 计算哈希值（简化版perceptual hash）
         gray = cv2.cvtColor(small_screen, cv2.COLOR_BGR2GRAY)
         gray = cv2.blur(gray, (3, 3))
         _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        hash_value = ""
-        for i in range(32):
-            for j in range(32):
-                hash_value += "1" if binary[i, j] > 127 else "0"
-        return hash_value
+        # 整体转换为"0"/"1"字符，避免逐像素拼接字符串
+        return ((binary > 127).astype(np.uint8) + ord("0")).tobytes().decode("ascii")
     
     def _find_clickable_elements(self, screen) -> List[Dict[str, Any]]:
         """
@@ -685,6 +793,7 @@ class AdvancedController(DeviceController):
             self.logger.error(f"重启设备失败: {str(e)}")
             return False
             
+    @_airtest_exclusive
     def explore_app(self, package_name: str, max_depth: int = 3, max_actions: int = 30) -> Dict[str, Any]:
         """
         探索应用界面
@@ -1480,15 +1589,15 @@ class AdvancedController(DeviceController):
                                 script_content.append(f"# 点击坐标: ({action['x']}, {action['y']})")
                                 script_content.append(f"touch(({action['x']}, {action['y']}))")
                             elif action["type"] == "long_press":
-                                script_content.append(f"# 长按坐标: ({action['x']}, 
-                                                      {action['y']}), 时长: {action['duration']}ms")
-                                script_content.append(f"touch(({action['x']}, 
-                                                      {action['y']}), duration={action['duration']/1000})")
+                                script_content.append(f"# 长按坐标: ({action['x']}, "
+                                                      f"{action['y']}), 时长: {action['duration']}ms")
+                                script_content.append(f"touch(({action['x']}, "
+                                                      f"{action['y']}), duration={action['duration']/1000})")
                             elif action["type"] == "swipe":
-                                script_content.append(f"# 滑动: 从({action['x1']}, 
-                                                      {action['y1']})到({action['x2']}, {action['y2']})")
-                                script_content.append(f"swipe(({action['x1']}, 
-                                                      {action['y1']}), ({action['x2']}, {action['y2']}))")
+                                script_content.append(f"# 滑动: 从({action['x1']}, "
+                                                      f"{action['y1']})到({action['x2']}, {action['y2']})")
+                                script_content.append(f"swipe(({action['x1']}, "
+                                                      f"{action['y1']}), ({action['x2']}, {action['y2']}))")
                             
                             # 添加延时
                             if len(actions) > 1 and actions.index(action) < len(actions) - 1:
@@ -1805,8 +1914,9 @@ class AdvancedController(DeviceController):
             try:
                 self.logger.debug("断开Airtest连接")
                 from airtest.core.helper import G
-                if hasattr(G, "DEVICE") and G.DEVICE:
-                    G.DEVICE.disconnect()
+                with _AIRTEST_LOCK:
+                    if hasattr(G, "DEVICE") and G.DEVICE:
+                        G.DEVICE.disconnect()
             except Exception as e:
                 self.logger.error(f"断开Airtest连接失败: {str(e)}")
         
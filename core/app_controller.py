@@ -104,13 +104,15 @@ class AppController(DeviceController):
         _, stderr, code = self.run_adb_cmd(f"shell pm clear {package_name}")
         return code == 0
         
-    def list_apps(self, system_apps: bool = False, third_party_apps: bool = True) -> List[Dict[str, str]]:
+    def list_apps(self, system_apps: bool = False, third_party_apps: bool = True,
+                  with_names: bool = True) -> List[Dict[str, str]]:
         """
         列出已安装应用
         
         Args:
             system_apps: 是否包含系统应用
             third_party_apps: 是否包含第三方应用
+            with_names: 是否查询应用显示名称（每个包需额外执行dumpsys），为False时app_name即包名
             
         Returns:
             应用列表，每个应用为字典 {package_name, app_name}
@@ -141,7 +143,7 @@ class AppController(DeviceController):
                 package_name = match.group(1)
                 
                 # 获取应用名称
-                app_name = self._get_app_name(package_name)
+                app_name = self._get_app_name(package_name) if with_names else package_name
                 
                 app_list.append({
                     "package_name": package_name,
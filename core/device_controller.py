@@ -4,17 +4,151 @@
 import os
 import time
 import logging
+import shlex
 import subprocess
-from typing import Tuple, List, Dict, Any, Optional, Union
+import threading
+import queue
+import uuid
+import socket
+import struct
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, List, Dict, Any, Optional, Union, Iterator
 from PIL import Image
 import json
 import re
 
+# 设备属性缓存有效期(秒)
+PROPS_CACHE_TTL = 5
+
+# 截图保存目录
+SCREENSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "screenshot")
+
+# 截图保存为JPEG时的质量
+SCREENSHOT_JPEG_QUALITY = 90
+
+# 截图保存为PNG时的压缩级别，较低级别编码更快
+SCREENSHOT_PNG_COMPRESS_LEVEL = 1
+
+# screencap原始帧缓冲像素格式对应的PIL解码模式: RGBA_8888, RGBX_8888, BGRA_8888
+_SCREENCAP_RAW_MODES = {1: "RGBX", 2: "RGBX", 5: "BGRX"}
+
+# getprop输出的属性行: [key]: [value]
+_RE_PROP = re.compile(r'^\[([^\]]+)\]:\s*\[([^\]]*)\]', re.M)
+
+
+# 本地adb server地址，端口与adb客户端一致可通过环境变量修改
+ADB_SERVER_HOST = "127.0.0.1"
+ADB_SERVER_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", 5037))
+
+
+class _AdbHandshakeError(ConnectionError):
+    """连接adb server或选择设备阶段失败，此时命令尚未下发，可安全改用其他方式重试"""
+
+
+class _AdbSocket:
+    """
+    直连adb server的shell客户端，按ADB协议经TCP下发命令，不启动adb进程
+    
+    adb server在shell服务结束后关闭连接，每条命令使用一个新的TCP连接。
+    """
+    
+    def __init__(self, device_id: str = None, host: str = ADB_SERVER_HOST, port: int = ADB_SERVER_PORT):
+        """
+        初始化客户端
+        
+        Args:
+            device_id: 设备ID，为空时使用唯一连接的设备
+            host: adb server地址
+            port: adb server端口
+        """
+        self.device_id = device_id
+        self.host = host
+        self.port = port
+    
+    @staticmethod
+    def _send_request(sock: socket.socket, request: str):
+        """发送请求，格式为4位十六进制长度前缀加请求内容"""
+        data = request.encode("utf-8")
+        sock.sendall(b"%04x%b" % (len(data), data))
+    
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        """读取指定长度的数据"""
+        buf = b""
+        while len(buf) < size:
+            data = sock.recv(size - len(buf))
+            if not data:
+                raise ConnectionError("adb server连接意外关闭")
+            buf += data
+        return buf
+    
+    def _check_okay(self, sock: socket.socket):
+        """读取请求状态，失败时抛出异常并携带adb server返回的错误信息"""
+        status = self._recv_exact(sock, 4)
+        if status != b"OKAY":
+            length = int(self._recv_exact(sock, 4), 16)
+            message = self._recv_exact(sock, length).decode("utf-8", errors="replace")
+            raise ConnectionError(f"adb server请求失败: {message}")
+    
+    def shell(self, shell_cmd: str, marker: str, timeout: int = 30) -> Tuple[bytes, int]:
+        """
+        执行shell命令
+        
+        Args:
+            shell_cmd: 设备端shell命令
+            marker: 结束标记，标记行携带命令退出码
+            timeout: 超时时间(秒)
+            
+        Returns:
+            (命令输出, 退出码)
+            
+        Raises:
+            _AdbHandshakeError: 下发命令前失败（连接、选择设备）
+            OSError: 下发命令后失败，此时命令可能已在设备上执行
+        """
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=timeout)
+        except OSError as e:
+            raise _AdbHandshakeError(f"连接adb server失败: {e}") from e
+            
+        with sock:
+            try:
+                self._send_request(sock, f"host:transport:{self.device_id}" if self.device_id else "host:transport-any")
+                self._check_okay(sock)
+            except OSError as e:
+                raise _AdbHandshakeError(f"选择设备失败: {e}") from e
+                
+            # 自此开始下发命令，之后的失败不可重试
+            self._send_request(sock, f"shell:{{ {shell_cmd}\n}} </dev/null 2>/dev/null; __rc=$?; echo; echo {marker} $__rc")
+            self._check_okay(sock)
+            
+            chunks = []
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+                
+        # 旧版本设备的shell服务会把换行转换为\r\n
+        output = b"".join(chunks).replace(b"\r\n", b"\n")
+        output, sep, tail = output.rpartition(marker.encode("utf-8"))
+        if not sep:
+            raise ConnectionError("未读取到命令结束标记")
+        # 去掉结束标记前额外输出的换行
+        if output.endswith(b"\n"):
+            output = output[:-1]
+        return output, int(tail.strip() or -3)
+
 
 class DeviceController:
     """
     Android设备控制器基类，封装ADB命令与设备交互
     """
+    
+    # 截图目录是否已创建，所有控制器实例共享
+    _screenshot_dir_ready = False
+    
     def __init__(self, adb_path: str = "adb", device_id: str = None):
         """
         初始化设备控制器
@@ -26,50 +160,327 @@ class DeviceController:
         self.adb_path = adb_path
         self.device_id = device_id
         self.logger = logging.getLogger("DeviceController")
-        self.screenshot_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "screenshot")
-        os.makedirs(self.screenshot_dir, exist_ok=True)
         
+        # 设备属性缓存，由一次getprop批量读取填充
+        self._props = {}
+        self._props_time = 0.0
+        self._props_device = None
+        
+        # 常驻adb shell会话，多条命令复用同一个adb进程
+        self._shell_lock = threading.Lock()
+        self._shell_process = None
+        self._shell_output = None
+        self._shell_device = None
+        self._shell_marker = f"__MCP_END_{uuid.uuid4().hex}__"
+        
+    @property
+    def screenshot_dir(self) -> str:
+        """截图保存目录，首次使用时创建"""
+        if not DeviceController._screenshot_dir_ready:
+            pathlib.Path(SCREENSHOT_DIR).mkdir(parents=True, exist_ok=True)
+            DeviceController._screenshot_dir_ready = True
+        return SCREENSHOT_DIR
+    
     def _build_adb_cmd(self, cmd: str) -> str:
         """构建ADB命令行"""
         if self.device_id:
             return f"{self.adb_path} -s {self.device_id} {cmd}"
         return f"{self.adb_path} {cmd}"
     
-    def run_adb_cmd(self, cmd: str, shell: bool = True, timeout: int = 30) -> Tuple[str, str, int]:
+    def _build_adb_argv(self, cmd: str, device_id: str = None) -> List[str]:
         """
-        执行ADB命令并返回结果
+        构建ADB命令参数列表
+        
+        shell/exec-out命令的剩余部分作为单个参数交给设备端shell解析，
+        保留管道、引号等语义；其余命令按shell规则拆分为参数。
         
         Args:
             cmd: ADB命令
-            shell: 是否使用shell执行
+            device_id: 设备ID，为None时使用当前设备
+            
+        Returns:
+            参数列表
+        """
+        argv = [self.adb_path]
+        target_device = device_id or self.device_id
+        if target_device:
+            argv += ["-s", target_device]
+        
+        subcmd, _, rest = cmd.strip().partition(" ")
+        if subcmd in ("shell", "exec-out") and rest.strip():
+            argv += [subcmd, rest.strip()]
+        else:
+            argv += shlex.split(cmd)
+        return argv
+    
+    @staticmethod
+    def _decode_output(data: bytes) -> str:
+        """将命令输出解码为文本，并统一换行符"""
+        text = data.decode("utf-8", errors="replace")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+    
+    def _run_adb_argv(self, argv: List[str], timeout: int = 30) -> Tuple[bytes, bytes, int]:
+        """
+        以参数列表方式执行ADB命令，不经过本地shell
+        
+        Args:
+            argv: 参数列表
             timeout: 命令超时时间(秒)
             
         Returns:
-            返回元组 (stdout, stderr, return_code)
+            返回元组 (stdout, stderr, return_code)，输出为原始字节
         """
-        full_cmd = self._build_adb_cmd(cmd)
-        self.logger.debug(f"执行命令: {full_cmd}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("执行命令: %s", argv)
         try:
             result = subprocess.run(
-                full_cmd, 
-                shell=shell, 
+                argv, 
                 timeout=timeout,
-                capture_output=True,
-                text=True
+                capture_output=True
             )
             return result.stdout, result.stderr, result.returncode
         except subprocess.TimeoutExpired:
-            self.logger.error(f"命令执行超时: {full_cmd}")
-            return "", f"Command timed out after {timeout} seconds", -1
-        except subprocess.CalledProcessError as e:
-            self.logger.error(f"命令执行返回错误状态码: {str(e)}")
-            return "", f"Command failed with exit code {e.returncode}: {e.stderr if hasattr(e, 'stderr') else ''}", e.returncode
+            self.logger.error("命令执行超时: %s", argv)
+            return b"", f"Command timed out after {timeout} seconds".encode(), -1
         except OSError as e:
             self.logger.error(f"命令执行系统错误: {str(e)}")
-            return "", f"System error: {str(e)}", -2
+            return b"", f"System error: {str(e)}".encode(), -2
         except Exception as e:
             self.logger.error(f"命令执行未知错误: {str(e)}")
-            return "", f"Unknown error: {str(e)}", -3
+            return b"", f"Unknown error: {str(e)}".encode(), -3
+    
+    def run_adb_cmd_bytes(self, cmd: str, timeout: int = 30) -> Tuple[bytes, bytes, int]:
+        """
+        执行ADB命令并返回原始字节输出，适用于截图等二进制数据
+        
+        Args:
+            cmd: ADB命令
+            timeout: 命令超时时间(秒)
+            
+        Returns:
+            返回元组 (stdout, stderr, return_code)
+        """
+        return self._run_adb_argv(self._build_adb_argv(cmd), timeout)
+    
+    def run_adb_cmd_lines(self, cmd: str, timeout: int = 30) -> Iterator[str]:
+        """
+        执行ADB命令并逐行产出输出，调用方可提前结束读取
+        
+        提前结束（或超时）时会终止ADB进程，不再读取剩余输出
+        
+        Args:
+            cmd: ADB命令
+            timeout: 命令超时时间(秒)
+            
+        Returns:
+            输出行迭代器（不含行尾换行符）
+        """
+        argv = self._build_adb_argv(cmd)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("执行命令: %s", argv)
+        try:
+            process = subprocess.Popen(
+                argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            self.logger.error(f"命令执行系统错误: {str(e)}")
+            return
+            
+        timer = threading.Timer(timeout, process.kill)
+        timer.daemon = True
+        timer.start()
+        try:
+            for raw_line in process.stdout:
+                yield raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+        finally:
+            timer.cancel()
+            if process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            process.wait()
+    
+    def _start_shell_session(self):
+        """启动常驻adb shell会话及其输出读取线程"""
+        argv = self._build_adb_argv("shell")
+        process = subprocess.Popen(
+            argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        output = queue.Queue()
+        
+        def read_output():
+            for raw_line in process.stdout:
+                output.put(raw_line)
+            # 会话结束
+            output.put(None)
+            
+        threading.Thread(target=read_output, name="adb-shell-reader", daemon=True).start()
+        self._shell_process = process
+        self._shell_output = output
+        self._shell_device = self.device_id
+    
+    def _stop_shell_session(self):
+        """结束常驻adb shell会话"""
+        process = self._shell_process
+        self._shell_process = None
+        self._shell_output = None
+        if process is not None and process.poll() is None:
+            try:
+                process.kill()
+                process.wait(timeout=5)
+            except Exception as e:
+                self.logger.error(f"结束adb shell会话失败: {str(e)}")
+    
+    def _run_adb_socket_shell(self, shell_cmd: str, timeout: int = 30) -> Tuple[str, str, int]:
+        """
+        直连adb server执行shell命令，命令下发前失败时改为启动adb进程执行；
+        下发后失败时命令可能已执行，直接返回失败而不重试，避免非幂等命令执行两次
+        
+        Args:
+            shell_cmd: 设备端shell命令（不含"shell"前缀）
+            timeout: 命令超时时间(秒)
+            
+        Returns:
+            返回元组 (stdout, stderr, return_code)
+        """
+        try:
+            output, code = _AdbSocket(self.device_id).shell(shell_cmd, self._shell_marker, timeout)
+            return self._decode_output(output), "", code
+        except _AdbHandshakeError as e:
+            self.logger.debug("直连adb server失败，改用adb进程执行: %s", e)
+            return self.run_adb_cmd(f"shell {shell_cmd}", timeout=timeout)
+        except socket.timeout:
+            return "", f"Command timed out after {timeout} seconds", -1
+        except OSError as e:
+            self.logger.error(f"直连adb server执行命令失败: {str(e)}")
+            return "", f"System error: {str(e)}", -2
+    
+    def run_adb_shell(self, shell_cmd: str, timeout: int = 30) -> Tuple[str, str, int]:
+        """
+        在常驻adb shell会话中执行命令，省去每条命令启动adb进程的开销
+        
+        会话正被其他线程占用时，改为直连adb server执行，不阻塞并发查询。
+        命令的标准错误输出不会被收集。
+        
+        Args:
+            shell_cmd: 设备端shell命令（不含"shell"前缀）
+            timeout: 命令超时时间(秒)
+            
+        Returns:
+            返回元组 (stdout, stderr, return_code)
+        """
+        if not self._shell_lock.acquire(blocking=False):
+            return self._run_adb_socket_shell(shell_cmd, timeout)
+            
+        try:
+            if self._shell_process is None or self._shell_process.poll() is not None \
+                    or self._shell_device != self.device_id:
+                self._stop_shell_session()
+                self._start_shell_session()
+                
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("会话执行命令: %s", shell_cmd)
+                
+            # 命令结束后输出换行和结束标记，标记行携带命令退出码
+            marker = self._shell_marker
+            script = f"{{ {shell_cmd}\n}} </dev/null 2>/dev/null; __rc=$?; echo; echo {marker} $__rc\n"
+            self._shell_process.stdin.write(script.encode("utf-8"))
+            self._shell_process.stdin.flush()
+            
+            deadline = time.monotonic() + timeout
+            marker_bytes = marker.encode("utf-8")
+            chunks = []
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    line = self._shell_output.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    # 会话状态未知，丢弃后下次重建
+                    self.logger.error("命令执行超时: %s", shell_cmd)
+                    self._stop_shell_session()
+                    return "", f"Command timed out after {timeout} seconds", -1
+                    
+                if line is None:
+                    self.logger.error("adb shell会话意外结束: %s", shell_cmd)
+                    self._stop_shell_session()
+                    return "", "adb shell session closed", -2
+                    
+                if line.startswith(marker_bytes):
+                    code = int(line[len(marker_bytes):].strip() or -3)
+                    break
+                chunks.append(line)
+                
+            # 去掉结束标记前额外输出的换行
+            output = self._decode_output(b"".join(chunks))
+            if output.endswith("\n"):
+                output = output[:-1]
+            return output, "", code
+        except OSError as e:
+            self.logger.error(f"adb shell会话执行失败: {str(e)}")
+            self._stop_shell_session()
+            return "", f"System error: {str(e)}", -2
+        finally:
+            self._shell_lock.release()
+    
+    def run_adb_cmd(self, cmd: str, shell: bool = True, timeout: int = 30) -> Tuple[str, str, int]:
+        """
+        执行ADB命令并返回结果
+        
+        Args:
+            cmd: ADB命令
+            shell: 兼容保留参数，命令始终以参数列表方式执行，不经过本地shell
+            timeout: 命令超时时间(秒)
+            
+        Returns:
+            返回元组 (stdout, stderr, return_code)
+        """
+        stdout, stderr, code = self.run_adb_cmd_bytes(cmd, timeout)
+        return self._decode_output(stdout), self._decode_output(stderr), code
+    
+    def _props_fresh(self) -> bool:
+        """属性缓存是否属于当前设备且仍在有效期内"""
+        return bool(self._props and self._props_device == self.device_id
+                    and time.monotonic() - self._props_time < PROPS_CACHE_TTL)
+    
+    def _load_props(self) -> Dict[str, str]:
+        """
+        通过一次getprop读取设备全部属性，结果在有效期内缓存
+        
+        Returns:
+            属性字典 {属性名: 属性值}
+        """
+        if self._props_fresh():
+            return self._props
+            
+        now = time.monotonic()
+        stdout, stderr, code = self.run_adb_shell("getprop")
+        if code != 0:
+            self.logger.error(f"读取设备属性失败: {stderr}")
+            return {}
+            
+        self._props = dict(_RE_PROP.findall(stdout))
+        self._props_time = now
+        self._props_device = self.device_id
+        return self._props
+    
+    def _props_get(self, key: str, default: str = "") -> str:
+        """
+        从属性缓存中读取单个设备属性
+        
+        Args:
+            key: 属性名
+            default: 属性不存在时的默认值
+            
+        Returns:
+            属性值
+        """
+        return self._load_props().get(key, default)
     
     def is_device_connected(self) -> bool:
         """检查设备是否已连接"""
@@ -100,26 +511,41 @@ class DeviceController:
             self.logger.error(f"解析屏幕分辨率失败: {str(e)}")
             return (0, 0)
     
-    def get_screenshot(self, filename: str = None, resize_ratio: float = 1.0) -> str:
+    def _capture_raw_screen(self) -> Optional[Image.Image]:
         """
-        获取屏幕截图并保存
+        通过exec-out screencap读取原始帧缓冲，省去设备端PNG编码与临时文件读写
         
-        Args:
-            filename: 文件名(不含路径)，为None时使用时间戳
-            resize_ratio: 图像缩放比例，默认为1.0不缩放
-            
         Returns:
-            保存的图片文件路径
+            屏幕图像(RGB)，设备不支持或数据格式无法识别时返回None
         """
-        if filename is None:
-            filename = f"screenshot_{int(time.time())}.png"
+        data, err, code = self.run_adb_cmd_bytes("exec-out screencap")
+        if code != 0 or len(data) < 12:
+            self.logger.debug("读取原始帧缓冲失败: %s", self._decode_output(err))
+            return None
+            
+        width, height, pixel_format = struct.unpack_from("<3I", data)
+        # 头部为宽、高、像素格式，Android 9起另有4字节色彩空间字段
+        header_size = len(data) - width * height * 4
+        raw_mode = _SCREENCAP_RAW_MODES.get(pixel_format)
+        if header_size not in (12, 16) or raw_mode is None:
+            self.logger.debug("无法识别的帧缓冲格式: %dx%d, format=%d, size=%d",
+                              width, height, pixel_format, len(data))
+            return None
+            
+        return Image.frombytes("RGB", (width, height), data[header_size:], "raw", raw_mode)
+    
+    def _pull_screenshot(self, filename: str, local_path: str) -> bool:
+        """
+        在设备端保存PNG截图后拉取到本地
         
-        # 确保文件名有正确的扩展名
-        if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-            filename += '.png'
+        Args:
+            filename: 文件名(不含路径)
+            local_path: 本地保存路径
             
+        Returns:
+            是否成功
+        """
         remote_path = f"/sdcard/{filename}"
-        local_path = os.path.join(self.screenshot_dir, filename)
         
         # 清理旧截图
         self.run_adb_cmd(f"shell rm -f {remote_path}")
@@ -128,30 +554,69 @@ class DeviceController:
         _, err, code = self.run_adb_cmd(f"shell screencap -p {remote_path}")
         if code != 0:
             self.logger.error(f"截屏失败: {err}")
-            return ""
+            return False
             
         # 从设备拉取截图
-        _, err, code = self.run_adb_cmd(f"pull {remote_path} {self.screenshot_dir}")
+        _, err, code = self.run_adb_cmd(f"pull {remote_path} {local_path}")
         if code != 0:
             self.logger.error(f"获取截图失败: {err}")
-            return ""
+            return False
+        return True
+    
+    def get_screenshot(self, filename: str = None, resize_ratio: float = 1.0) -> str:
+        """
+        获取屏幕截图并保存
+        
+        Args:
+            filename: 文件名(不含路径)，为None时使用时间戳
+            resize_ratio: 图像缩放比例，默认为1.0不缩放
+            
+        Returns:
+            保存的图片文件路径
+        """
+        if filename is None:
+            filename = f"screenshot_{int(time.time())}.png"
+        
+        # 确保文件名有正确的扩展名
+        if not filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+            filename += '.png'
             
-        # 如果需要调整大小
-        if resize_ratio != 1.0:
+        local_path = os.path.join(self.screenshot_dir, filename)
+        
+        image = self._capture_raw_screen()
+        if image is None:
+            # 不支持读取原始帧缓冲时，退回设备端PNG截图
+            if not self._pull_screenshot(filename, local_path):
+                return ""
+            if resize_ratio == 1.0:
+                return local_path
             try:
                 image = Image.open(local_path)
+            except Exception as e:
+                self.logger.error(f"处理截图失败: {str(e)}")
+                return local_path
+                
+        try:
+            # 如果需要调整大小
+            if resize_ratio != 1.0:
                 original_width, original_height = image.size
                 new_width = int(original_width * resize_ratio)
                 new_height = int(original_height * resize_ratio)
-                resized_image = image.resize((new_width, new_height))
+                # 按区域平均缩小，先以整数倍reduce再重采样，缩小倍数较大时明显更快
+                image = image.resize((new_width, new_height), Image.BOX, reducing_gap=2.0)
                 
-                # 转换格式并保存
-                jpg_filename = os.path.splitext(filename)[0] + '.jpg'
-                jpg_path = os.path.join(self.screenshot_dir, jpg_filename)
-                resized_image.convert("RGB").save(jpg_path, "JPEG")
-                return jpg_path
-            except Exception as e:
-                self.logger.error(f"处理截图失败: {str(e)}")
+                # 缩放后的截图统一保存为JPEG
+                local_path = os.path.join(self.screenshot_dir, os.path.splitext(filename)[0] + '.jpg')
+                
+            if local_path.lower().endswith('.png'):
+                image.save(local_path, "PNG", compress_level=SCREENSHOT_PNG_COMPRESS_LEVEL)
+            else:
+                if image.mode != "RGB":
+                    image = image.convert("RGB")
+                image.save(local_path, "JPEG", quality=SCREENSHOT_JPEG_QUALITY)
+        except Exception as e:
+            self.logger.error(f"处理截图失败: {str(e)}")
+            return ""
         
         return local_path
     
@@ -175,7 +640,7 @@ class DeviceController:
             x_pixel = int(x)
             y_pixel = int(y)
             
-        _, err, code = self.run_adb_cmd(f"shell input tap {x_pixel} {y_pixel}")
+        _, err, code = self.run_adb_shell(f"input tap {x_pixel} {y_pixel}")
         return code == 0
     
     def long_press(self, x: Union[float, int], y: Union[float, int], 
@@ -200,8 +665,8 @@ class DeviceController:
             x_pixel = int(x)
             y_pixel = int(y)
             
-        _, err, code = self.run_adb_cmd(
-            f"shell input swipe {x_pixel} {y_pixel} {x_pixel} {y_pixel} {duration}"
+        _, err, code = self.run_adb_shell(
+            f"input swipe {x_pixel} {y_pixel} {x_pixel} {y_pixel} {duration}"
         )
         return code == 0
     
@@ -234,10 +699,68 @@ class DeviceController:
             x2_pixel = int(x2)
             y2_pixel = int(y2)
             
-        _, err, code = self.run_adb_cmd(
-            f"shell input swipe {x1_pixel} {y1_pixel} {x2_pixel} {y2_pixel} {duration}"
+        _, err, code = self.run_adb_shell(
+            f"input swipe {x1_pixel} {y1_pixel} {x2_pixel} {y2_pixel} {duration}"
         )
         return code == 0
+
+    def run_gesture_script(self, steps: List[Dict[str, Any]], is_percent: bool = True) -> bool:
+        """
+        在设备端一次性执行一组点击/滑动步骤
+
+        所有步骤拼接成一条shell命令，在常驻adb shell会话中执行，
+        步骤之间的等待由设备端sleep完成。
+
+        Args:
+            steps: 步骤列表，如 [{"action": "tap", "x": 0.2, "y": 0.6, "delay_ms": 500}, ...]
+                   支持的action: tap(x, y)、swipe(x1, y1, x2, y2, duration)
+            is_percent: 坐标是否为屏幕百分比，默认True
+
+        Returns:
+            是否成功，步骤缺少坐标或取值无效时返回False
+        """
+        if not steps:
+            return True
+
+        if is_percent:
+            width, height = self.get_device_resolution()
+        else:
+            width = height = 1
+
+        commands = []
+        total_delay_ms = 0
+        for index, step in enumerate(steps):
+            action = step.get("action", "tap")
+            try:
+                if action == "tap":
+                    commands.append(
+                        f"input tap {int(float(step['x']) * width)} {int(float(step['y']) * height)}"
+                    )
+                elif action == "swipe":
+                    commands.append(
+                        f"input swipe {int(float(step['x1']) * width)} {int(float(step['y1']) * height)} "
+                        f"{int(float(step['x2']) * width)} {int(float(step['y2']) * height)} "
+                        f"{int(step.get('duration', 300))}"
+                    )
+                else:
+                    self.logger.error(f"不支持的脚本动作: {action}")
+                    return False
+
+                delay_ms = int(step.get("delay_ms", 0))
+            except KeyError as e:
+                self.logger.error(f"脚本第{index + 1}步缺少参数: {e}")
+                return False
+            except (TypeError, ValueError) as e:
+                self.logger.error(f"脚本第{index + 1}步参数无效: {e}")
+                return False
+
+            if delay_ms > 0:
+                commands.append(f"sleep {delay_ms / 1000:g}")
+                total_delay_ms += delay_ms
+
+        script = " && ".join(commands)
+        _, err, code = self.run_adb_shell(script, timeout=30 + total_delay_ms // 1000)
+        return code == 0
     
     def multi_touch(self, points: List[Tuple[float, float]], is_percent: bool = False) -> bool:
         """
@@ -397,7 +920,7 @@ class DeviceController:
         Returns:
             是否成功
         """
-        _, err, code = self.run_adb_cmd("shell input keyevent 4")
+        _, err, code = self.run_adb_shell("input keyevent 4")
         return code == 0
     
     def go_to_home(self) -> bool:
@@ -407,8 +930,8 @@ class DeviceController:
         Returns:
             是否成功
         """
-        _, err, code = self.run_adb_cmd(
-            "shell am start -a android.intent.action.MAIN -c android.intent.category.HOME"
+        _, err, code = self.run_adb_shell(
+            "am start -a android.intent.action.MAIN -c android.intent.category.HOME"
         )
         return code == 0
     
@@ -419,7 +942,7 @@ class DeviceController:
         Returns:
             是否成功
         """
-        _, err, code = self.run_adb_cmd("shell input keyevent 26")
+        _, err, code = self.run_adb_shell("input keyevent 26")
         return code == 0
     
     def keyevent(self, keycode: int) -> bool:
@@ -432,7 +955,7 @@ class DeviceController:
         Returns:
             是否成功
         """
-        _, err, code = self.run_adb_cmd(f"shell input keyevent {keycode}")
+        _, err, code = self.run_adb_shell(f"input keyevent {keycode}")
         return code == 0
     
     def type_text(self, text: str) -> bool:
@@ -451,15 +974,15 @@ class DeviceController:
         
         for char in text:
             if char == ' ':
-                _, err, code = self.run_adb_cmd("shell input text %s")
+                _, err, code = self.run_adb_shell("input text %s")
             elif char == '_':
-                _, err, code = self.run_adb_cmd("shell input keyevent 66")  # 回车键
+                _, err, code = self.run_adb_shell("input keyevent 66")  # 回车键
             elif 'a' <= char <= 'z' or 'A' <= char <= 'Z' or char.isdigit():
-                _, err, code = self.run_adb_cmd(f"shell input text {char}")
+                _, err, code = self.run_adb_shell(f"input text {char}")
             elif char in '-.,!?@\'°/:;()':
-                _, err, code = self.run_adb_cmd(f"shell input text \"{char}\"")
+                _, err, code = self.run_adb_shell(f"input text {shlex.quote(char)}")
             else:
-                _, err, code = self.run_adb_cmd(f"shell am broadcast -a ADB_INPUT_TEXT --es msg \"{char}\"")
+                _, err, code = self.run_adb_shell(f"am broadcast -a ADB_INPUT_TEXT --es msg {shlex.quote(char)}")
                 
             if code != 0:
                 success = False
@@ -478,25 +1001,29 @@ class DeviceController:
         """
         info = {}
         
+        # 属性缓存已过期时，分辨率查询(wm size)与属性读取(getprop)并发执行
+        if self._props_fresh():
+            width, height = self.get_device_resolution()
+        else:
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="adb-device-info") as pool:
+                resolution = pool.submit(self.get_device_resolution)
+                self._load_props()
+                width, height = resolution.result()
+        
         # 获取Android版本
-        stdout, _, _ = self.run_adb_cmd("shell getprop ro.build.version.release")
-        info["android_version"] = stdout.strip()
+        info["android_version"] = self._props_get("ro.build.version.release")
         
         # 获取设备型号
-        stdout, _, _ = self.run_adb_cmd("shell getprop ro.product.model")
-        info["model"] = stdout.strip()
+        info["model"] = self._props_get("ro.product.model")
         
         # 获取设备制造商
-        stdout, _, _ = self.run_adb_cmd("shell getprop ro.product.manufacturer")
-        info["manufacturer"] = stdout.strip()
+        info["manufacturer"] = self._props_get("ro.product.manufacturer")
         
         # 获取设备分辨率
-        width, height = self.get_device_resolution()
         info["resolution"] = f"{width}x{height}"
         
         # 获取序列号
-        stdout, _, _ = self.run_adb_cmd("shell getprop ro.serialno")
-        info["serial"] = stdout.strip()
+        info["serial"] = self._props_get("ro.serialno")
         
         return info
     
@@ -516,12 +1043,12 @@ class DeviceController:
             self.logger.warning(f"可能的命令注入尝试: {shell_cmd}")
             return "命令包含不允许的字符", False
         
-        # 执行经过验证的命令
-        stdout, stderr, code = self.run_adb_cmd(f"shell {shell_cmd}", timeout=timeout)
+        # 在常驻会话中通过独立的子shell执行，cd、export、exit等不会影响会话状态，标准错误合并到输出中返回
+        stdout, stderr, code = self.run_adb_shell(f"sh -c {shlex.quote(shell_cmd)} 2>&1", timeout=timeout)
         
         if code != 0:
-            self.logger.error(f"Shell命令执行失败: {stderr}")
-            return stderr, False
+            self.logger.error(f"Shell命令执行失败: {stderr or stdout}")
+            return stderr or stdout, False
             
         return stdout, True
     
@@ -865,5 +1392,7 @@ class DeviceController:
         清理控制器资源，在服务关闭时调用
         """
         self.logger.info("清理设备控制器资源...")
-        # 目前没有需要清理的资源
-        pass 
\ No newline at end of file
+        
+        # 结束常驻adb shell会话
+        with self._shell_lock:
+            self._stop_shell_session()
\ No newline at end of file
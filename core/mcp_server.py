@@ -3,20 +3,65 @@ MCP协议服务器实现
 """
 import os
 import json
+import asyncio
 import logging
 import inspect
 import signal
 import atexit
 import threading
-from typing import Dict, List, Any, Callable, Optional, Union
+from types import MappingProxyType
+from typing import Dict, List, Any, Callable, Optional, Union, Literal
 from fastapi import FastAPI, Request, Response, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+import msgspec
 import uvicorn
+from fastjsonschema import JsonSchemaException
+
+# 尝试导入orjson，提供更快的JSON序列化
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # 日志配置
 logger = logging.getLogger("mcp_server")
 
+# 预先构造的JSON-RPC响应信封模板，只需填入已序列化的id/result/error
+_ENV_OK = b'{"jsonrpc":"2.0","id":%b,"result":%b}'
+_ENV_ERR = b'{"jsonrpc":"2.0","id":%b,"error":{"code":%d,"message":%b}}'
+
+
+def _json_default(obj: Any) -> Any:
+    """
+    序列化器无法直接处理的类型的转换函数，支持工具返回的只读映射(MappingProxyType)
+    
+    Args:
+        obj: 待转换对象
+        
+    Returns:
+        可序列化的对象
+    """
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """
+    将对象序列化为JSON字节串
+    
+    Args:
+        obj: 待序列化对象
+        
+    Returns:
+        UTF-8编码的JSON字节串
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_json_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, default=_json_default).encode("utf-8")
+
 
 class MCPError(Exception):
     """MCP错误异常"""
@@ -26,15 +71,15 @@ class MCPError(Exception):
         super().__init__(self.message)
 
 
-class MCPRequest(BaseModel):
+class MCPRequest(msgspec.Struct, kw_only=True):
     """MCP请求模型"""
-    jsonrpc: str = Field("2.0", const=True)
+    jsonrpc: Literal["2.0"]
     id: Optional[Union[int, str]] = None
     method: str
     params: Optional[Dict[str, Any]] = {}
 
 
-class MCPResponse(BaseModel):
+class MCPResponse(msgspec.Struct, kw_only=True, omit_defaults=True):
     """MCP响应模型"""
     jsonrpc: str = "2.0"
     id: Optional[Union[int, str]] = None
@@ -42,6 +87,10 @@ class MCPResponse(BaseModel):
     error: Optional[Dict[str, Any]] = None
 
 
+# 请求解码器，JSON解析与请求格式校验一次完成
+_request_decoder = msgspec.json.Decoder(MCPRequest)
+
+
 class MCPTool:
     """MCP工具定义"""
     def __init__(
@@ -50,13 +99,57 @@ class MCPTool:
         description: str, 
         handler: Callable, 
         input_schema: Dict[str, Any] = None,
-        annotations: Dict[str, Any] = None
+        annotations: Dict[str, Any] = None,
+        validator: Callable = None
     ):
         self.name = name
         self.description = description
         self.handler = handler
         self.input_schema = input_schema or {}
         self.annotations = annotations or {}
+        # 预编译的参数校验函数(fastjsonschema)，为None时不校验
+        self.validator = validator
+        # 调用入口，注册时按处理方法类型与是否校验预先生成
+        self.call = self._build_call(handler, validator)
+    
+    @staticmethod
+    def _build_call(handler: Callable, validator: Optional[Callable]) -> Callable:
+        """
+        生成工具的异步调用入口，调用时无需再判断处理方法是否为协程函数及是否需要校验
+        
+        同步处理方法（阻塞的adb调用）在事件循环的默认线程池中执行，不阻塞其他请求，
+        批量请求中的各工具调用也因此能够真正并发。
+        
+        Args:
+            handler: 处理方法
+            validator: 参数校验函数
+            
+        Returns:
+            异步调用入口 call(params)
+        """
+        is_async = inspect.iscoroutinefunction(handler)
+        
+        if validator is None:
+            if is_async:
+                return handler
+                
+            async def call(params: Dict[str, Any]) -> Any:
+                return await asyncio.get_running_loop().run_in_executor(None, handler, params)
+            return call
+            
+        def validate(params: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                return validator(params)
+            except JsonSchemaException as e:
+                raise MCPError(f"无效的工具参数: {e.message}", -32602)
+                
+        if is_async:
+            async def call(params: Dict[str, Any]) -> Any:
+                return await handler(validate(params))
+        else:
+            async def call(params: Dict[str, Any]) -> Any:
+                return await asyncio.get_running_loop().run_in_executor(None, handler, validate(params))
+        return call
 
 
 class MCPServer:
@@ -81,6 +174,9 @@ class MCPServer:
         # MCP工具集合
         self.tools = {}
         
+        # 只读的工具快照，请求处理路径无锁读取，注册时整体替换
+        self._tools_snapshot = MappingProxyType({})
+        
         # 添加核心工具
         self.register_core_tools()
         
@@ -97,7 +193,7 @@ class MCPServer:
     
     def _handle_signal(self, signum, frame):
         """处理终止信号"""
-        logger.info(f"收到信号 {signum}，准备清理资源并退出")
+        logger.info("收到信号 %s，准备清理资源并退出", signum)
         self.cleanup()
         
     def register_controller(self, controller):
@@ -118,19 +214,19 @@ class MCPServer:
         for thread in self.resources["running_threads"]:
             if thread.is_alive():
                 try:
-                    logger.debug(f"停止线程: {thread.name}")
+                    logger.debug("停止线程: %s", thread.name)
                     # 这里无法强制停止线程，依赖线程自己检查退出标志
                 except Exception as e:
-                    logger.error(f"停止线程失败: {str(e)}")
+                    logger.error("停止线程失败: %s", e)
         
         # 清理控制器资源
         for controller in self.resources["controllers"]:
             try:
-                logger.debug(f"清理控制器: {controller.__class__.__name__}")
+                logger.debug("清理控制器: %s", controller.__class__.__name__)
                 if hasattr(controller, "cleanup") and callable(controller.cleanup):
                     controller.cleanup()
             except Exception as e:
-                logger.error(f"清理控制器失败: {str(e)}")
+                logger.error("清理控制器失败: %s", e)
                 
         logger.info("资源清理完成")
     
@@ -163,6 +259,11 @@ class MCPServer:
                 "required": ["name"]
             }
         )
+        self._publish_tools()
+    
+    def _publish_tools(self):
+        """发布当前工具集合的只读快照"""
+        self._tools_snapshot = MappingProxyType(dict(self.tools))
     
     def register_tool(self, tool: MCPTool):
         """
@@ -174,6 +275,19 @@ class MCPServer:
         logger.info(f"注册MCP工具: {tool.name}")
         name = f"tools/{tool.name}"
         self.tools[name] = tool
+        self._publish_tools()
+    
+    def register_tools(self, tools: List[MCPTool]):
+        """
+        批量注册MCP工具，全部加入后只发布一次工具快照
+        
+        Args:
+            tools: 工具实例列表
+        """
+        for tool in tools:
+            logger.info(f"注册MCP工具: {tool.name}")
+            self.tools[f"tools/{tool.name}"] = tool
+        self._publish_tools()
     
     async def handle_jsonrpc(self, request: Request) -> Response:
         """
@@ -194,13 +308,16 @@ class MCPServer:
                 return self._create_error_response(None, "无效的空请求", -32600)
                 
             try:
-                data = json.loads(body.decode("utf-8"))
-            except json.JSONDecodeError:
+                data = _request_decoder.decode(body)
+            except msgspec.ValidationError:
+                # 不是合法的单个请求，按普通JSON解析后再区分批量请求与无效请求
+                data = msgspec.json.decode(body)
+            except msgspec.DecodeError:
                 return self._create_error_response(None, "无效的JSON", -32700)
                 
             # 处理批量请求
             if isinstance(data, list):
-                return self._handle_batch_request(data)
+                return await self._handle_batch_request(data)
                 
             # 处理单个请求
             return await self._handle_single_request(data)
@@ -208,89 +325,101 @@ class MCPServer:
         except MCPError as e:
             # 已知的MCP错误类型，直接传递错误码和消息
             logger.warning(f"MCP错误: {e.message} (代码: {e.code})")
-            return self._create_error_response(
-                None if data is None else (data.get("id") if isinstance(data, dict) else None),
-                e.message,
-                e.code
-            )
+            return self._create_error_response(self._get_request_id(data), e.message, e.code)
         except Exception as e:
             # 捕获所有其他未处理的异常，返回标准JSON-RPC错误
             logger.error(f"处理JSON-RPC请求时发生未捕获的异常: {str(e)}", exc_info=True)
-            return self._create_error_response(
-                None if data is None else (data.get("id") if isinstance(data, dict) else None),
-                "Internal error",
-                -32603
-            )
+            return self._create_error_response(self._get_request_id(data), "Internal error", -32603)
+    
+    @staticmethod
+    def _get_request_id(data: Any) -> Union[int, str, None]:
+        """从请求数据中提取请求ID"""
+        if isinstance(data, MCPRequest):
+            return data.id
+        if isinstance(data, dict):
+            return data.get("id")
+        return None
     
-    async def _handle_single_request(self, data: Dict[str, Any]) -> Response:
+    async def _handle_single_request(self, data: Union[MCPRequest, Dict[str, Any]]) -> Response:
         """处理单个JSON-RPC请求"""
+        return Response(
+            content=await self._process_request(data),
+            media_type="application/json"
+        )
+    
+    async def _process_request(self, data: Union[MCPRequest, Dict[str, Any]]) -> bytes:
+        """
+        处理单个JSON-RPC请求并返回序列化后的响应信封
+        
+        Args:
+            data: 已校验的请求，或待校验的原始请求数据
+            
+        Returns:
+            JSON响应字节串
+        """
         # 验证请求格式
-        if not isinstance(data, dict) or data.get("jsonrpc") != "2.0" or "method" not in data:
-            return self._create_error_response(data.get("id"), "无效的请求", -32600)
+        if not isinstance(data, MCPRequest):
+            try:
+                data = msgspec.convert(data, MCPRequest)
+            except msgspec.ValidationError:
+                return self._build_error_envelope(self._get_request_id(data), "无效的请求", -32600)
             
         # 获取请求ID和方法
-        request_id = data.get("id")
-        method = data.get("method")
-        params = data.get("params", {})
+        request_id = data.id
+        method = data.method
+        params = data.params if data.params is not None else {}
         
         # 查找处理方法
-        if method not in self.tools:
-            return self._create_error_response(request_id, f"方法未找到: {method}", -32601)
+        tool = self._tools_snapshot.get(method)
+        if tool is None:
+            return self._build_error_envelope(request_id, f"方法未找到: {method}", -32601)
             
         try:
             # 调用处理方法
-            tool = self.tools[method]
-            result = await self._call_handler(tool.handler, params)
+            result = await tool.call(params)
             
             # 返回成功响应
-            return self._create_success_response(request_id, result)
+            return self._build_success_envelope(request_id, result)
         except MCPError as e:
             logger.warning(f"处理请求 '{method}' 时发生MCP错误: {e.message} (代码: {e.code})")
-            return self._create_error_response(request_id, e.message, e.code)
+            return self._build_error_envelope(request_id, e.message, e.code)
         except Exception as e:
             logger.error(f"处理请求 '{method}' 时发生错误: {str(e)}", exc_info=True)
-            return self._create_error_response(request_id, f"服务器内部错误: {str(e)}", -32603)
+            return self._build_error_envelope(request_id, f"服务器内部错误: {str(e)}", -32603)
+    
+    async def _handle_batch_request(self, batch: List[Dict[str, Any]]) -> Response:
+        """处理批量JSON-RPC请求，各请求并发执行"""
+        if not batch:
+            return self._create_error_response(None, "无效的空批量请求", -32600)
+            
+        envelopes = await asyncio.gather(*[self._process_request(item) for item in batch])
+        return Response(
+            content=b"[" + b",".join(envelopes) + b"]",
+            media_type="application/json"
+        )
     
-    def _handle_batch_request(self, batch: List[Dict[str, Any]]) -> Response:
-        """处理批量JSON-RPC请求"""
-        # 暂不支持批量请求
-        return self._create_error_response(None, "不支持批量请求", -32600)
+    def _build_success_envelope(self, request_id: Union[int, str, None], result: Any) -> bytes:
+        """构造成功响应信封"""
+        return _ENV_OK % (_json_dumps(request_id), _json_dumps(result))
+        
+    def _build_error_envelope(self, request_id: Union[int, str, None], message: str, code: int = -32000) -> bytes:
+        """构造错误响应信封"""
+        return _ENV_ERR % (_json_dumps(request_id), code, _json_dumps(message))
         
     def _create_success_response(self, request_id: Union[int, str, None], result: Any) -> Response:
         """创建成功响应"""
-        response = MCPResponse(
-            jsonrpc="2.0",
-            id=request_id,
-            result=result
-        )
         return Response(
-            content=json.dumps(response.dict(exclude_none=True)),
+            content=self._build_success_envelope(request_id, result),
             media_type="application/json"
         )
         
     def _create_error_response(self, request_id: Union[int, str, None], message: str, code: int = -32000) -> Response:
         """创建错误响应"""
-        response = MCPResponse(
-            jsonrpc="2.0",
-            id=request_id,
-            error={
-                "code": code,
-                "message": message
-            }
-        )
         return Response(
-            content=json.dumps(response.dict(exclude_none=True)),
+            content=self._build_error_envelope(request_id, message, code),
             media_type="application/json"
         )
         
-    async def _call_handler(self, handler: Callable, params: Dict[str, Any]) -> Any:
-        """调用处理方法"""
-        # 检查处理方法是否为异步
-        if inspect.iscoroutinefunction(handler):
-            return await handler(params)
-        else:
-            return handler(params)
-    
     def _handle_tools_list(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         处理tools/list方法
@@ -303,7 +432,7 @@ class MCPServer:
         """
         tools_list = []
         
-        for name, tool in self.tools.items():
+        for name, tool in self._tools_snapshot.items():
             # 只返回tools/下的工具，排除核心方法
             if name.startswith("tools/") and name != "tools/list" and name != "tools/call":
                 tools_list.append({
@@ -315,7 +444,7 @@ class MCPServer:
         
         return {"tools": tools_list}
     
-    def _handle_tools_call(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_tools_call(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         处理tools/call方法
         
@@ -329,15 +458,16 @@ class MCPServer:
         tool_params = params.get("parameters", {})
         
         # 检查工具是否存在
-        full_tool_name = f"tools/{tool_name}"
-        if full_tool_name not in self.tools:
+        tool = self._tools_snapshot.get(f"tools/{tool_name}")
+        if tool is None:
             raise MCPError(f"工具未找到: {tool_name}", -32601)
             
-        # 调用工具
-        tool = self.tools[full_tool_name]
+        # 调用工具，参数校验在调用入口内完成
         try:
-            result = tool.handler(tool_params)
+            result = await tool.call(tool_params)
             return {"result": result}
+        except MCPError:
+            raise
         except Exception as e:
             logger.error(f"调用工具 '{tool_name}' 时发生错误: {str(e)}")
             raise MCPError(f"工具调用失败: {str(e)}")
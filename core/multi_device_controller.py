@@ -4,16 +4,29 @@
 import os
 import json
 import time
+import asyncio
 import logging
 import threading
 import socket
 import tempfile
+from collections import deque
 from typing import Dict, List, Any, Tuple, Optional, Union, Callable
-import queue
 import subprocess
 
 from core.device_controller import DeviceController
 
+# 设备间复制文件时的本地中转目录，优先使用内存文件系统(tmpfs)
+STAGING_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# 每个设备消息队列保留的最大消息数，超出后丢弃最旧的消息
+MESSAGE_QUEUE_MAXLEN = 1000
+
+# 等待设备跟踪线程推送首个设备列表的最长时间(秒)，超时则回退到adb devices
+DEVICE_TRACKER_TIMEOUT = 2
+
+# 设备跟踪进程启动失败或连接断开后重新启动的最长间隔(秒)，间隔从1秒起逐次翻倍
+DEVICE_TRACKER_MAX_BACKOFF = 30
+
 
 class MultiDeviceController(DeviceController):
     """
@@ -34,19 +47,51 @@ class MultiDeviceController(DeviceController):
         # 添加线程锁保护共享资源
         self._device_groups_lock = threading.RLock()
         self._message_queues_lock = threading.RLock()
-        self._sync_locks_lock = threading.RLock()
+        self._sync_locks_lock = threading.Lock()
         self._shared_data_lock = threading.RLock()
         
         self.device_groups = {}  # 设备组 {组名: [设备ID列表]}
-        self.message_queues = {}  # 设备消息队列 {设备ID: Queue}
-        self.sync_locks = {}  # 同步锁 {锁名: threading.Event}
+        self.message_queues = {}  # 设备消息队列 {设备ID: (deque, asyncio.Event)}
+        self.sync_locks = {}  # 同步锁 {锁名: asyncio.Event}
         self.shared_data = {}  # 共享数据 {键: 值}
+        
+        # 设备列表缓存，由后台adb track-devices线程在设备变化时更新
+        self._device_cache_lock = threading.Lock()
+        self._device_cache = None  # [{"serial": 设备ID, "status": 设备状态}]
+        self._device_cache_ready = threading.Event()
+        # 设备跟踪当前是否不可用（进程启动失败或连接已断开），不可用时直接执行adb devices
+        self._device_tracker_failed = False
+        self._device_tracker = None
+        self._device_tracker_process = None
+        self._device_tracker_stop = threading.Event()
+    
+    def _get_message_queue(self, device_id: str) -> Tuple[deque, asyncio.Event]:
+        """获取设备的消息队列，不存在时创建"""
+        with self._message_queues_lock:
+            entry = self.message_queues.get(device_id)
+            if entry is None:
+                entry = (deque(maxlen=MESSAGE_QUEUE_MAXLEN), asyncio.Event())
+                self.message_queues[device_id] = entry
+            return entry
     
-    def device_messaging(self, action: str, device_id: str = None, 
-                         message: str = None, timeout: int = 5) -> Dict[str, Any]:
+    def _get_sync_lock(self, lock_name: str) -> asyncio.Event:
+        """获取同步锁，已存在时无需加锁直接返回，不存在时创建"""
+        lock_obj = self.sync_locks.get(lock_name)
+        if lock_obj is None:
+            with self._sync_locks_lock:
+                lock_obj = self.sync_locks.get(lock_name)
+                if lock_obj is None:
+                    lock_obj = asyncio.Event()
+                    self.sync_locks[lock_name] = lock_obj
+        return lock_obj
+    
+    async def device_messaging(self, action: str, device_id: str = None, 
+                               message: str = None, timeout: int = 5) -> Dict[str, Any]:
         """
         设备间消息传递
         
+        消息队列为deque，收发通过asyncio.Event通知，接收方挂起协程等待新消息
+        
         Args:
             action: 操作类型，send（发送消息）、receive（接收消息）、clear（清空消息）
             device_id: 目标设备ID或来源设备ID
@@ -56,12 +101,6 @@ class MultiDeviceController(DeviceController):
         Returns:
             操作结果
         """
-        # 初始化消息队列
-        if action in ("send", "receive") and device_id:
-            with self._message_queues_lock:
-                if device_id not in self.message_queues:
-                    self.message_queues[device_id] = queue.Queue()
-            
         # 发送消息到设备
         if action == "send":
             if not device_id:
@@ -70,24 +109,22 @@ class MultiDeviceController(DeviceController):
             if not message:
                 return {"success": False, "message": "消息内容不能为空"}
                 
-            # 检查目标设备是否存在
-            devices = self._list_all_devices()
+            # 检查目标设备是否存在，设备列表查询可能阻塞，放到线程池中执行以免阻塞事件循环
+            devices = await asyncio.get_running_loop().run_in_executor(None, self._list_all_devices)
             device_exists = any(d.get("serial") == device_id for d in devices)
             
             if not device_exists:
                 return {"success": False, "message": f"设备 {device_id} 不存在或未连接"}
                 
-            # 将消息放入队列
+            # 将消息放入队列并通知接收方
             try:
-                with self._message_queues_lock:
-                    if device_id not in self.message_queues:
-                        self.message_queues[device_id] = queue.Queue()
-                    
-                    self.message_queues[device_id].put({
-                        "timestamp": time.time(),
-                        "sender": self.device_id or "unknown",
-                        "content": message
-                    })
+                messages, event = self._get_message_queue(device_id)
+                messages.append({
+                    "timestamp": time.time(),
+                    "sender": self.device_id or "unknown",
+                    "content": message
+                })
+                event.set()
                 
                 return {"success": True, "message": "消息已发送"}
             except Exception as e:
@@ -100,29 +137,22 @@ class MultiDeviceController(DeviceController):
                 
             source_id = device_id or self.device_id
             
-            # 检查队列是否存在
-            with self._message_queues_lock:
-                if source_id not in self.message_queues:
-                    self.message_queues[source_id] = queue.Queue()
-                    return {"success": True, "messages": []}
-            
-            # 从队列获取消息
-            messages = []
             try:
-                # 非阻塞方式获取所有消息
-                queue_obj = None
-                with self._message_queues_lock:
-                    queue_obj = self.message_queues[source_id]
+                messages, event = self._get_message_queue(source_id)
                 
-                while True:
+                # 队列为空时等待新消息到达
+                if not messages:
                     try:
-                        msg = queue_obj.get(block=True, timeout=timeout)
-                        messages.append(msg)
-                        queue_obj.task_done()
-                    except queue.Empty:
-                        break
+                        await asyncio.wait_for(event.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        return {"success": True, "messages": []}
+                
+                # 一次性取出所有消息
+                received = list(messages)
+                messages.clear()
+                event.clear()
                         
-                return {"success": True, "messages": messages}
+                return {"success": True, "messages": received}
             except Exception as e:
                 return {"success": False, "message": f"接收消息失败: {str(e)}"}
                 
@@ -135,27 +165,27 @@ class MultiDeviceController(DeviceController):
             
             # 检查队列是否存在
             with self._message_queues_lock:
-                if target_id in self.message_queues:
-                    try:
-                        # 清空队列
-                        queue_obj = self.message_queues[target_id]
-                        while not queue_obj.empty():
-                            queue_obj.get()
-                            queue_obj.task_done()
-                            
-                        return {"success": True, "message": "消息已清空"}
-                    except Exception as e:
-                        return {"success": False, "message": f"清空消息失败: {str(e)}"}
-                else:
-                    return {"success": True, "message": "无消息队列需要清空"}
+                entry = self.message_queues.get(target_id)
+            if entry is None:
+                return {"success": True, "message": "无消息队列需要清空"}
+                
+            try:
+                messages, event = entry
+                messages.clear()
+                event.clear()
+                return {"success": True, "message": "消息已清空"}
+            except Exception as e:
+                return {"success": False, "message": f"清空消息失败: {str(e)}"}
         else:
             return {"success": False, "message": f"不支持的操作类型: {action}"}
     
-    def sync_operations(self, action: str, lock_name: str = None, 
-                        timeout: int = 30) -> Dict[str, bool]:
+    async def sync_operations(self, action: str, lock_name: str = None, 
+                              timeout: int = 30) -> Dict[str, bool]:
         """
         多设备同步操作
         
+        锁基于asyncio.Event实现，等待方挂起协程而不占用线程
+        
         Args:
             action: 操作类型，create（创建锁）、wait（等待锁）、set（设置锁）、release（释放锁）
             lock_name: 锁名称
@@ -167,61 +197,59 @@ class MultiDeviceController(DeviceController):
         if not lock_name:
             return {"success": False, "message": "未指定锁名称"}
             
-        # 创建锁
-        if action == "create":
-            with self._sync_locks_lock:
-                self.sync_locks[lock_name] = threading.Event()
-            return {"success": True, "message": f"已创建锁 {lock_name}"}
-            
-        # 等待锁
-        elif action == "wait":
-            lock_obj = None
-            with self._sync_locks_lock:
-                if lock_name not in self.sync_locks:
-                    self.sync_locks[lock_name] = threading.Event()
-                lock_obj = self.sync_locks[lock_name]
-                
-            try:
-                # 等待锁被设置
-                success = lock_obj.wait(timeout=timeout)
-                if success:
-                    return {"success": True, "message": f"锁 {lock_name} 已触发"}
-                else:
-                    return {"success": False, "message": f"等待锁 {lock_name} 超时"}
-            except Exception as e:
-                return {"success": False, "message": f"等待锁失败: {str(e)}"}
-                
-        # 设置锁
-        elif action == "set":
-            with self._sync_locks_lock:
-                if lock_name not in self.sync_locks:
-                    self.sync_locks[lock_name] = threading.Event()
-                lock_obj = self.sync_locks[lock_name]
-                
-            try:
-                # 设置锁，通知所有等待该锁的线程
-                lock_obj.set()
-                return {"success": True, "message": f"已设置锁 {lock_name}"}
-            except Exception as e:
-                return {"success": False, "message": f"设置锁失败: {str(e)}"}
-                
-        # 释放锁
-        elif action == "release":
-            lock_obj = None
-            with self._sync_locks_lock:
-                if lock_name in self.sync_locks:
-                    lock_obj = self.sync_locks[lock_name]
-                else:
-                    return {"success": False, "message": f"锁 {lock_name} 不存在"}
-                    
-            try:
-                # 清除锁，重置为未设置状态
-                lock_obj.clear()
-                return {"success": True, "message": f"已释放锁 {lock_name}"}
-            except Exception as e:
-                return {"success": False, "message": f"释放锁失败: {str(e)}"}
-        else:
+        handler = self._SYNC_ACTIONS.get(action)
+        if handler is None:
             return {"success": False, "message": f"不支持的操作类型: {action}"}
+        return await handler(self, lock_name, timeout)
+    
+    async def _sync_create(self, lock_name: str, timeout: int) -> Dict[str, Any]:
+        """创建锁，已存在时重置为未设置状态"""
+        with self._sync_locks_lock:
+            self.sync_locks[lock_name] = asyncio.Event()
+        return {"success": True, "message": f"已创建锁 {lock_name}"}
+    
+    async def _sync_wait(self, lock_name: str, timeout: int) -> Dict[str, Any]:
+        """等待锁被设置，超时返回失败"""
+        lock_obj = self._get_sync_lock(lock_name)
+        
+        try:
+            # 等待锁被设置
+            await asyncio.wait_for(lock_obj.wait(), timeout)
+            return {"success": True, "message": f"锁 {lock_name} 已触发"}
+        except asyncio.TimeoutError:
+            return {"success": False, "message": f"等待锁 {lock_name} 超时"}
+        except Exception as e:
+            return {"success": False, "message": f"等待锁失败: {str(e)}"}
+    
+    async def _sync_set(self, lock_name: str, timeout: int) -> Dict[str, Any]:
+        """设置锁，唤醒所有等待该锁的协程"""
+        lock_obj = self._get_sync_lock(lock_name)
+        
+        try:
+            lock_obj.set()
+            return {"success": True, "message": f"已设置锁 {lock_name}"}
+        except Exception as e:
+            return {"success": False, "message": f"设置锁失败: {str(e)}"}
+    
+    async def _sync_release(self, lock_name: str, timeout: int) -> Dict[str, Any]:
+        """释放锁，重置为未设置状态"""
+        lock_obj = self.sync_locks.get(lock_name)
+        if lock_obj is None:
+            return {"success": False, "message": f"锁 {lock_name} 不存在"}
+            
+        try:
+            lock_obj.clear()
+            return {"success": True, "message": f"已释放锁 {lock_name}"}
+        except Exception as e:
+            return {"success": False, "message": f"释放锁失败: {str(e)}"}
+    
+    # 同步操作分派表 {操作类型: 处理方法}
+    _SYNC_ACTIONS = {
+        "create": _sync_create,
+        "wait": _sync_wait,
+        "set": _sync_set,
+        "release": _sync_release
+    }
     
     def device_group_actions(self, action: str, group_name: str = None, 
                              device_ids: List[str] = None, 
@@ -360,25 +388,25 @@ class MultiDeviceController(DeviceController):
                 if target_device not in device_serials:
                     return {"success": False, "message": f"目标设备 {target_device} 不存在或未连接"}
                 
-                # 创建临时文件
-                with tempfile.NamedTemporaryFile(delete=False) as temp:
+                # 创建临时文件，优先放在内存文件系统中，避免大文件落盘
+                with tempfile.NamedTemporaryFile(delete=False, dir=STAGING_DIR) as temp:
                     temp_path = temp.name
-                
-                # 从源设备下载文件到临时文件
-                _, stderr, code = self.run_adb_cmd(f"pull {device_path} {temp_path}", source_device)
-                if code != 0:
-                    os.unlink(temp_path)
-                    return {"success": False, "message": f"从源设备下载文件失败: {stderr}"}
-                    
-                # 上传临时文件到目标设备
-                _, stderr, code = self.run_adb_cmd(f"push {temp_path} {device_path}", target_device)
-                
-                # 删除临时文件
+
                 try:
-                    os.unlink(temp_path)
-                except:
-                    pass
-                    
+                    # 从源设备下载文件到临时文件
+                    _, stderr, code = self.run_adb_cmd(f"pull {device_path} {temp_path}", source_device)
+                    if code != 0:
+                        return {"success": False, "message": f"从源设备下载文件失败: {stderr}"}
+
+                    # 上传临时文件到目标设备
+                    _, stderr, code = self.run_adb_cmd(f"push {temp_path} {device_path}", target_device)
+                finally:
+                    # 删除临时文件
+                    try:
+                        os.unlink(temp_path)
+                    except OSError:
+                        pass
+
                 if code != 0:
                     return {"success": False, "message": f"上传文件到目标设备失败: {stderr}"}
                     
@@ -423,31 +451,112 @@ class MultiDeviceController(DeviceController):
         """
         列出所有已连接设备
         
+        优先读取后台设备跟踪线程维护的缓存，缓存不可用时执行adb devices
+        
         Returns:
             设备列表 [{"serial": 设备ID, "status": 设备状态}]
         """
+        self._start_device_tracker()
+        if self._device_tracker_failed or self._device_cache_ready.wait(DEVICE_TRACKER_TIMEOUT):
+            with self._device_cache_lock:
+                cached = self._device_cache
+            if cached is not None:
+                return [dict(device) for device in cached]
+        
         stdout, _, _ = self.run_adb_cmd("devices")
-        devices = []
+        return self._parse_device_list(stdout)
+    
+    @staticmethod
+    def _parse_device_list(output: str) -> List[Dict[str, str]]:
+        """
+        解析设备列表输出，兼容adb devices与adb track-devices格式
         
-        lines = stdout.strip().split('\n')
-        if len(lines) <= 1:
-            return []
+        Args:
+            output: 命令输出
             
-        for line in lines[1:]:  # 跳过标题行
-            if not line.strip():
-                continue
-                
+        Returns:
+            设备列表 [{"serial": 设备ID, "status": 设备状态}]
+        """
+        devices = []
+        for line in output.splitlines():
+            # 标题行和空行不含制表符
             parts = line.strip().split('\t')
             if len(parts) >= 2:
-                serial = parts[0]
-                status = parts[1]
                 devices.append({
-                    "serial": serial,
-                    "status": status
+                    "serial": parts[0],
+                    "status": parts[1]
                 })
-                
         return devices
     
+    def _start_device_tracker(self):
+        """启动后台设备跟踪线程，只启动一次"""
+        with self._device_cache_lock:
+            if self._device_tracker is not None:
+                return
+            self._device_tracker = threading.Thread(
+                target=self._track_devices, name="adb-track-devices", daemon=True
+            )
+        self._device_tracker.start()
+    
+    def _track_devices(self):
+        """
+        后台线程：读取adb track-devices推送的设备列表并更新缓存
+        
+        每次推送为4位十六进制长度加设备列表内容，仅在设备变化时推送；
+        启动失败或连接断开（如adb服务重启）时清空缓存、标记不可用，并按退避间隔重新启动
+        """
+        backoff = 1
+        while not self._device_tracker_stop.is_set():
+            try:
+                process = subprocess.Popen(
+                    [self.adb_path, "track-devices"],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                )
+            except OSError as e:
+                self.logger.error(f"启动设备跟踪失败，{backoff}秒后重试: {str(e)}")
+                self._mark_device_tracker_failed()
+                self._device_tracker_stop.wait(backoff)
+                backoff = min(backoff * 2, DEVICE_TRACKER_MAX_BACKOFF)
+                continue
+                
+            self._device_tracker_process = process
+            try:
+                while True:
+                    header = process.stdout.read(4)
+                    if len(header) < 4:
+                        break
+                    length = int(header, 16)
+                    payload = process.stdout.read(length) if length else b""
+                    if len(payload) < length:
+                        break
+                        
+                    devices = self._parse_device_list(payload.decode("utf-8", errors="replace"))
+                    with self._device_cache_lock:
+                        self._device_cache = devices
+                        self._device_tracker_failed = False
+                    self._device_cache_ready.set()
+                    # 收到推送说明跟踪正常，重置退避间隔
+                    backoff = 1
+            except ValueError:
+                self.logger.warning("设备跟踪输出格式无法解析")
+            finally:
+                self._mark_device_tracker_failed()
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+                
+            # 按退避间隔重新连接
+            self._device_tracker_stop.wait(backoff)
+            backoff = min(backoff * 2, DEVICE_TRACKER_MAX_BACKOFF)
+    
+    def _mark_device_tracker_failed(self):
+        """标记设备跟踪不可用：清空缓存，并唤醒正在等待首个设备列表的调用方改用adb devices"""
+        with self._device_cache_lock:
+            self._device_cache = None
+            self._device_tracker_failed = True
+        self._device_cache_ready.set()
+    
     # 在特定设备上执行ADB命令的辅助方法
     def run_adb_cmd(self, cmd: str, device_id: str = None, 
                     shell: bool = True, timeout: int = 30) -> Tuple[str, str, int]:
@@ -457,38 +566,14 @@ class MultiDeviceController(DeviceController):
         Args:
             cmd: ADB命令
             device_id: 设备ID，为None时使用当前设备
-            shell: 是否使用shell执行
+            shell: 兼容保留参数，命令始终以参数列表方式执行，不经过本地shell
             timeout: 命令超时时间(秒)
             
         Returns:
             返回元组 (stdout, stderr, return_code)
         """
-        # 如果未指定设备ID，使用当前设备ID
-        target_device = device_id or self.device_id
-        
-        # 构建ADB命令
-        if target_device:
-            full_cmd = f"{self.adb_path} -s {target_device} {cmd}"
-        else:
-            full_cmd = f"{self.adb_path} {cmd}"
-            
-        self.logger.debug(f"执行命令: {full_cmd}")
-        
-        try:
-            result = subprocess.run(
-                full_cmd, 
-                shell=shell, 
-                timeout=timeout,
-                capture_output=True,
-                text=True
-            )
-            return result.stdout, result.stderr, result.returncode
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"命令执行超时: {full_cmd}")
-            return "", f"Command timed out after {timeout} seconds", -1
-        except Exception as e:
-            self.logger.error(f"命令执行错误: {str(e)}")
-            return "", str(e), -2
+        stdout, stderr, code = self._run_adb_argv(self._build_adb_argv(cmd, device_id), timeout)
+        return self._decode_output(stdout), self._decode_output(stderr), code
             
     def cleanup(self):
         """
@@ -504,16 +589,20 @@ class MultiDeviceController(DeviceController):
                 except Exception as e:
                     self.logger.error(f"释放锁 {lock_name} 失败: {str(e)}")
         
+        # 停止设备跟踪线程
+        self._device_tracker_stop.set()
+        process = self._device_tracker_process
+        if process is not None and process.poll() is None:
+            try:
+                process.kill()
+            except Exception as e:
+                self.logger.error(f"停止设备跟踪进程失败: {str(e)}")
+        
         # 清空消息队列
         with self._message_queues_lock:
-            for device_id, queue_obj in self.message_queues.items():
+            for device_id, (messages, _) in self.message_queues.items():
                 try:
-                    while not queue_obj.empty():
-                        try:
-                            queue_obj.get_nowait()
-                            queue_obj.task_done()
-                        except:
-                            break
+                    messages.clear()
                 except Exception as e:
                     self.logger.error(f"清空设备 {device_id} 的消息队列失败: {str(e)}")
         
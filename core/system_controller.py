@@ -3,16 +3,134 @@
 """
 import re
 import time
+import threading
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Tuple
 
 from core.device_controller import DeviceController
 
+# 并发执行相互独立的ADB查询时使用的最大线程数
+IO_POOL_WORKERS = 8
+
+# 连接WiFi后等待连接成功的最长时间(秒)
+WIFI_CONNECT_TIMEOUT = 10
+
+# 网络状态缓存有效期(秒)，用于合并短时间内的重复查询
+NETWORK_INFO_TTL = 0.2
+
+# WiFi详细信息缓存有效期(秒)，短时间内重复查询直接返回缓存结果
+WIFI_INFO_TTL = 1.0
+
+# 输出解析用正则，模块加载时预编译
+_RE_BATTERY_KV = re.compile(r'^\s*(level|temperature|status|health):\s+(\d+)', re.M)
+_RE_MEM = re.compile(r'^(MemTotal|MemFree|MemAvailable):\s+(\d+)', re.M)
+_RE_WIFI_KV = re.compile(r'\b(SSID|BSSID|RSSI|Link speed|Frequency):\s*([^,}\n]+)')
+_RE_WIFI_SSID = re.compile(r'SSID: (.*?),')
+_RE_IP = re.compile(r'inet (\d+\.\d+\.\d+\.\d+)')
+
+# 电池状态码与名称的对应关系
+_BATTERY_STATUS = {
+    1: "unknown",
+    2: "charging",
+    3: "discharging",
+    4: "not charging",
+    5: "full"
+}
+
+# 电池健康状态码与名称的对应关系
+_BATTERY_HEALTH = {
+    1: "unknown",
+    2: "good",
+    3: "overheat",
+    4: "dead",
+    5: "over voltage",
+    6: "unspecified failure",
+    7: "cold"
+}
+
+# 电池字段名到取值转换函数的映射，温度通常是实际温度的10倍
+_BATTERY_CONVERTERS = {
+    "level": int,
+    "temperature": lambda v: int(v) / 10.0,
+    "status": lambda v: _BATTERY_STATUS.get(int(v), "unknown"),
+    "health": lambda v: _BATTERY_HEALTH.get(int(v), "unknown")
+}
+
+# /proc/meminfo字段与返回字段的对应关系
+_MEM_FIELDS = {
+    "MemTotal": "total",
+    "MemFree": "free",
+    "MemAvailable": "available"
+}
+
+# WiFi信息字段到(返回字段, 取值转换函数)的映射
+_WIFI_FIELDS = {
+    "SSID": ("ssid", lambda v: v.strip('"')),
+    "BSSID": ("bssid", str),
+    "RSSI": ("rssi", int),
+    "Link speed": ("link_speed", str),
+    "Frequency": ("frequency", str)
+}
+
 
 class SystemController(DeviceController):
     """
     系统信息控制器，提供设备信息、性能数据等查询功能
     """
     
+    def __init__(self, adb_path: str = "adb", device_id: str = None):
+        """
+        初始化系统信息控制器
+        
+        Args:
+            adb_path: ADB命令路径
+            device_id: 设备ID，如果有多个设备连接时需要指定
+        """
+        super().__init__(adb_path, device_id)
+        self._io_pool = None
+        self._io_pool_lock = threading.Lock()
+        
+        # 连接期间不会变化的设备属性缓存 {(设备ID, 属性名): 值}
+        self._static_cache = {}
+        
+        # 最近一次查询到的网络信息及其时间戳(time.monotonic)
+        self._net_info = None
+        self._net_info_ts = 0.0
+        
+        # 最近一次查询到的WiFi详细信息及其时间戳(time.monotonic)
+        self._wifi_info = None
+        self._wifi_info_ts = 0.0
+    
+    def _get_static(self, name: str, loader) -> Any:
+        """
+        读取不随时间变化的设备属性，同一设备只查询一次
+        
+        Args:
+            name: 属性名
+            loader: 缓存未命中时用于查询属性的函数
+            
+        Returns:
+            属性值，查询结果为空时不缓存
+        """
+        key = (self.device_id, name)
+        if key in self._static_cache:
+            return self._static_cache[key]
+            
+        value = loader()
+        if value:
+            self._static_cache[key] = value
+        return value
+    
+    def _get_io_pool(self) -> ThreadPoolExecutor:
+        """获取用于并发ADB查询的线程池，首次使用时创建"""
+        with self._io_pool_lock:
+            if self._io_pool is None:
+                self._io_pool = ThreadPoolExecutor(
+                    max_workers=IO_POOL_WORKERS, thread_name_prefix="adb-io"
+                )
+            return self._io_pool
+    
     def get_android_version(self) -> str:
         """
         获取设备Android版本
@@ -20,8 +138,7 @@ class SystemController(DeviceController):
         Returns:
             Android版本号
         """
-        stdout, _, _ = self.run_adb_cmd("shell getprop ro.build.version.release")
-        return stdout.strip()
+        return self._get_static("android_version", lambda: self._props_get("ro.build.version.release"))
     
     def get_device_serial(self) -> str:
         """
@@ -30,8 +147,7 @@ class SystemController(DeviceController):
         Returns:
             设备序列号
         """
-        stdout, _, _ = self.run_adb_cmd("shell getprop ro.serialno")
-        return stdout.strip()
+        return self._get_static("serial", lambda: self._props_get("ro.serialno"))
     
     def get_battery_info(self) -> Dict[str, Any]:
         """
@@ -40,53 +156,24 @@ class SystemController(DeviceController):
         Returns:
             电量信息 {level, temperature, status, health}
         """
-        stdout, stderr, code = self.run_adb_cmd("shell dumpsys battery")
-        
-        if code != 0:
-            self.logger.error(f"获取电池信息失败: {stderr}")
-            return {}
-            
         battery_info = {}
-        lines = stdout.strip().split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if "level:" in line:
-                match = re.search(r'level:\s+(\d+)', line)
-                if match:
-                    battery_info["level"] = int(match.group(1))
-            elif "temperature:" in line:
-                match = re.search(r'temperature:\s+(\d+)', line)
-                if match:
-                    # 温度通常是实际温度的10倍
-                    battery_info["temperature"] = float(match.group(1)) / 10.0
-            elif "status:" in line:
-                match = re.search(r'status:\s+(\d+)', line)
-                if match:
-                    status_code = int(match.group(1))
-                    status_map = {
-                        1: "unknown",
-                        2: "charging",
-                        3: "discharging",
-                        4: "not charging",
-                        5: "full"
-                    }
-                    battery_info["status"] = status_map.get(status_code, "unknown")
-            elif "health:" in line:
-                match = re.search(r'health:\s+(\d+)', line)
-                if match:
-                    health_code = int(match.group(1))
-                    health_map = {
-                        1: "unknown",
-                        2: "good",
-                        3: "overheat",
-                        4: "dead",
-                        5: "over voltage",
-                        6: "unspecified failure",
-                        7: "cold"
-                    }
-                    battery_info["health"] = health_map.get(health_code, "unknown")
+        needed = set(_BATTERY_CONVERTERS)
+        
+        # 逐行读取，所需字段全部取到后即停止读取
+        with closing(self.run_adb_cmd_lines("shell dumpsys battery")) as lines:
+            for line in lines:
+                match = _RE_BATTERY_KV.match(line)
+                if not match or match.group(1) not in needed:
+                    continue
+                key, value = match.groups()
+                battery_info[key] = _BATTERY_CONVERTERS[key](value)
+                needed.discard(key)
+                if not needed:
+                    break
                     
+        if not battery_info:
+            self.logger.error("获取电池信息失败")
+            
         return battery_info
     
     def get_memory_info(self) -> Dict[str, Any]:
@@ -96,107 +183,112 @@ class SystemController(DeviceController):
         Returns:
             内存信息 {total, free, available} 单位为MB
         """
-        stdout, stderr, code = self.run_adb_cmd("shell cat /proc/meminfo")
+        stdout, stderr, code = self.run_adb_shell("cat /proc/meminfo")
         
         if code != 0:
             self.logger.error(f"获取内存信息失败: {stderr}")
             return {}
             
-        memory_info = {}
-        lines = stdout.strip().split('\n')
+        # 转换为MB
+        memory_info = {_MEM_FIELDS[key]: int(value) / 1024 for key, value in _RE_MEM.findall(stdout)}
         
-        for line in lines:
-            line = line.strip()
-            if "MemTotal:" in line:
-                match = re.search(r'MemTotal:\s+(\d+)', line)
-                if match:
-                    # 转换为MB
-                    memory_info["total"] = int(match.group(1)) / 1024
-            elif "MemFree:" in line:
-                match = re.search(r'MemFree:\s+(\d+)', line)
-                if match:
-                    memory_info["free"] = int(match.group(1)) / 1024
-            elif "MemAvailable:" in line:
-                match = re.search(r'MemAvailable:\s+(\d+)', line)
-                if match:
-                    memory_info["available"] = int(match.group(1)) / 1024
-                    
         return memory_info
     
-    def get_cpu_info(self) -> Dict[str, Any]:
+    def get_cpu_info(self, samples: int = 2) -> Dict[str, Any]:
         """
         获取设备CPU信息
         
+        Args:
+            samples: CPU使用率的采样次数，大于2时额外返回各采样区间的使用率，usage取其平均值
+            
         Returns:
-            CPU信息 {cores, architecture, model, usage}
-        """
-        # 获取CPU核心数
-        stdout, _, _ = self.run_adb_cmd("shell cat /proc/cpuinfo | grep processor | wc -l")
-        cores = int(stdout.strip()) if stdout.strip().isdigit() else 0
-        
-        # 获取CPU架构
-        stdout, _, _ = self.run_adb_cmd("shell getprop ro.product.cpu.abi")
-        architecture = stdout.strip()
-        
-        # 获取CPU型号
-        stdout, _, _ = self.run_adb_cmd("shell cat /proc/cpuinfo | grep 'model name'")
+            CPU信息 {cores, architecture, model, usage[, usage_samples]}
+        """
+        # 核心数、架构、型号不会变化，只在首次查询；使用率每次重新采样
+        static_key = (self.device_id, "cpu_info")
+        cpu_static = self._static_cache.get(static_key)
+        if cpu_static is not None:
+            return dict(cpu_static, **self._sample_cpu_usage(samples))
+        
+        # 各项查询互不依赖，并发执行；CPU使用率采样的等待时间与其他查询重叠
+        pool = self._get_io_pool()
+        cpuinfo_future = pool.submit(self.run_adb_shell, "cat /proc/cpuinfo")
+        architecture_future = pool.submit(self._props_get, "ro.product.cpu.abi")
+        usage_future = pool.submit(self._sample_cpu_usage, samples)
+        
+        # 核心数与型号均从同一份/proc/cpuinfo中解析
+        stdout, _, _ = cpuinfo_future.result()
+        cores = 0
         model = ""
-        if stdout.strip():
-            match = re.search(r'model name\s+:\s+(.*)', stdout.strip())
-            if match:
-                model = match.group(1)
+        for line in stdout.splitlines():
+            if line.startswith("processor"):
+                cores += 1
+            elif not model and line.startswith("model name"):
+                model = line.split(":", 1)[-1].strip()
         
-        # 获取CPU使用率
-        usage = self._get_cpu_usage()
+        # 获取CPU架构
+        architecture = architecture_future.result()
         
-        return {
+        cpu_static = {
             "cores": cores,
             "architecture": architecture,
-            "model": model,
-            "usage": usage
+            "model": model
         }
+        if cores and architecture:
+            self._static_cache[static_key] = cpu_static
+        
+        # 获取CPU使用率
+        return dict(cpu_static, **usage_future.result())
     
-    def _get_cpu_usage(self) -> float:
-        """获取CPU使用率"""
-        # 第一次采样
-        stdout1, _, _ = self.run_adb_cmd("shell cat /proc/stat | grep '^cpu '")
-        if not stdout1.strip():
-            return 0.0
+    def _sample_cpu_usage(self, samples: int = 2) -> Dict[str, Any]:
+        """
+        按采样次数获取CPU使用率
+        
+        Args:
+            samples: 采样次数，不大于2时只采样一个区间
             
-        # 解析第一次数据
-        parts1 = stdout1.strip().split()
-        if len(parts1) < 5:
+        Returns:
+            {usage}，多区间时为{usage, usage_samples}
+        """
+        if samples <= 2:
+            return {"usage": self._get_cpu_usage()}
+        
+        usage_samples = self._get_cpu_usage_batch(samples)
+        usage = sum(usage_samples) / len(usage_samples) if usage_samples else 0.0
+        return {"usage": usage, "usage_samples": usage_samples}
+    
+    def _read_cpu_times(self) -> List[int]:
+        """
+        读取/proc/stat中汇总CPU行的前四项时间
+        
+        Returns:
+            [user, nice, system, idle]，读取失败时返回空列表
+        """
+        stdout, _, _ = self.run_adb_shell("cat /proc/stat")
+        line = next((l for l in stdout.splitlines() if l.startswith("cpu ")), "")
+        parts = line.split()
+        if len(parts) < 5:
+            return []
+        return list(map(int, parts[1:5]))
+    
+    def _get_cpu_usage(self, interval: float = 0.5) -> float:
+        """获取CPU使用率，interval为两次采样的间隔(秒)"""
+        # 第一次采样
+        times1 = self._read_cpu_times()
+        if not times1:
             return 0.0
-            
-        user1 = int(parts1[1])
-        nice1 = int(parts1[2])
-        system1 = int(parts1[3])
-        idle1 = int(parts1[4])
         
         # 等待一段时间
-        time.sleep(0.5)
+        time.sleep(interval)
         
         # 第二次采样
-        stdout2, _, _ = self.run_adb_cmd("shell cat /proc/stat | grep '^cpu '")
-        if not stdout2.strip():
-            return 0.0
-            
-        # 解析第二次数据
-        parts2 = stdout2.strip().split()
-        if len(parts2) < 5:
+        times2 = self._read_cpu_times()
+        if not times2:
             return 0.0
-            
-        user2 = int(parts2[1])
-        nice2 = int(parts2[2])
-        system2 = int(parts2[3])
-        idle2 = int(parts2[4])
         
         # 计算使用率
-        total1 = user1 + nice1 + system1 + idle1
-        total2 = user2 + nice2 + system2 + idle2
-        
-        total_diff = total2 - total1
-        idle_diff = idle2 - idle1
+        total_diff = sum(times2) - sum(times1)
+        idle_diff = times2[3] - times1[3]
         
         # 防止除零错误
         if total_diff <= 0:
@@ -205,6 +297,46 @@ class SystemController(DeviceController):
         usage = 100.0 * (1.0 - idle_diff / total_diff)
         return usage
     
+    def _get_cpu_usage_batch(self, samples: int = 5, interval: float = 0.5) -> List[float]:
+        """
+        连续多次采样CPU使用率，适用于监控场景下的批量轮询
+        
+        Args:
+            samples: 采样次数，返回samples-1个相邻采样区间的使用率
+            interval: 采样间隔(秒)
+            
+        Returns:
+            各采样区间的CPU使用率列表
+        """
+        # 不足两次采样时没有可计算的区间
+        if samples <= 1:
+            return []
+        
+        # 单区间直接走普通路径，不导入NumPy
+        if samples == 2:
+            return [self._get_cpu_usage(interval)]
+            
+        import numpy as np
+        
+        readings = []
+        for i in range(samples):
+            if i:
+                time.sleep(interval)
+            times = self._read_cpu_times()
+            if not times:
+                return []
+            readings.append(times)
+            
+        arr = np.array(readings, dtype=np.int64)
+        total_diff = np.diff(arr.sum(axis=1))
+        idle_diff = np.diff(arr[:, 3])
+        
+        # 防止除零错误，总时间无增长的区间记为0
+        valid = total_diff > 0
+        usage = np.zeros(len(total_diff), dtype=np.float64)
+        usage[valid] = 100.0 * (1.0 - idle_diff[valid] / total_diff[valid])
+        return usage.tolist()
+    
     def get_storage_info(self) -> Dict[str, Any]:
         """
         获取设备存储信息
@@ -212,39 +344,33 @@ class SystemController(DeviceController):
         Returns:
             存储信息 {total, used, free} 单位为MB
         """
-        stdout, stderr, code = self.run_adb_cmd("shell df -h /data")
+        # 以KB为单位输出，避免解析-h的带单位数值
+        stdout, stderr, code = self.run_adb_shell("df -k /data")
         
         if code != 0:
             self.logger.error(f"获取存储信息失败: {stderr}")
             return {}
             
-        storage_info = {}
         lines = stdout.strip().split('\n')
         if len(lines) < 2:
             return {}
             
-        # 解析df输出
-        parts = lines[1].split()
+        # 解析df输出，文件系统名过长时数据可能折行
+        parts = " ".join(lines[1:]).split()
         if len(parts) < 4:
             return {}
             
+        try:
+            total_kb, used_kb, free_kb = (int(value) for value in parts[1:4])
+        except ValueError:
+            return {}
+            
         # 转换为MB
-        def convert_to_mb(size_str):
-            if 'G' in size_str:
-                return float(size_str.replace('G', '')) * 1024
-            elif 'M' in size_str:
-                return float(size_str.replace('M', ''))
-            elif 'K' in size_str:
-                return float(size_str.replace('K', '')) / 1024
-            else:
-                try:
-                    return float(size_str) / (1024 * 1024)
-                except ValueError:
-                    return 0
-        
-        storage_info["total"] = convert_to_mb(parts[1])
-        storage_info["used"] = convert_to_mb(parts[2])
-        storage_info["free"] = convert_to_mb(parts[3])
+        storage_info = {
+            "total": total_kb // 1024,
+            "used": used_kb // 1024,
+            "free": free_kb // 1024
+        }
         
         return storage_info
     
@@ -255,32 +381,92 @@ class SystemController(DeviceController):
         Returns:
             网络信息 {wifi_enabled, mobile_data_enabled, airplane_mode, wifi_name}
         """
-        # 获取WiFi状态
-        stdout, _, _ = self.run_adb_cmd("shell settings get global wifi_on")
-        wifi_enabled = stdout.strip() == "1"
-        
-        # 获取移动数据状态
-        stdout, _, _ = self.run_adb_cmd("shell settings get global mobile_data")
-        mobile_data_enabled = stdout.strip() == "1"
+        # 并发查询各项设置，直接查询设备而不读取缓存
+        pool = self._get_io_pool()
+        wifi_future = pool.submit(self._get_global_setting_enabled, "wifi_on")
+        mobile_data_future = pool.submit(self._get_global_setting_enabled, "mobile_data")
+        airplane_future = pool.submit(self._get_global_setting_enabled, "airplane_mode_on")
         
-        # 获取飞行模式状态
-        stdout, _, _ = self.run_adb_cmd("shell settings get global airplane_mode_on")
-        airplane_mode = stdout.strip() == "1"
+        wifi_enabled = wifi_future.result()
+        mobile_data_enabled = mobile_data_future.result()
+        airplane_mode = airplane_future.result()
         
         # 获取WiFi名称
-        wifi_name = ""
-        if wifi_enabled:
-            stdout, _, _ = self.run_adb_cmd("shell dumpsys wifi | grep 'mWifiInfo'")
-            match = re.search(r'SSID: (.*?),', stdout)
-            if match:
-                wifi_name = match.group(1).strip('"')
-        
-        return {
+        wifi_name = self._get_current_ssid() if wifi_enabled else ""
+        
+        network_info = {
             "wifi_enabled": wifi_enabled,
             "mobile_data_enabled": mobile_data_enabled,
             "airplane_mode": airplane_mode,
             "wifi_name": wifi_name
         }
+        self._net_info = network_info
+        self._net_info_ts = time.monotonic()
+        return network_info
+    
+    def _cached_network_field(self, field: str) -> Any:
+        """
+        从未过期的网络信息缓存中取单个字段
+        
+        Args:
+            field: 字段名
+            
+        Returns:
+            字段值，缓存不存在或已过期时返回None
+        """
+        if self._net_info is not None and time.monotonic() - self._net_info_ts < NETWORK_INFO_TTL:
+            return self._net_info[field]
+        return None
+    
+    def _invalidate_network_info(self):
+        """网络设置变更后使缓存失效"""
+        self._net_info = None
+        self._wifi_info = None
+    
+    def _get_global_setting_enabled(self, name: str) -> bool:
+        """
+        查询global设置项是否开启
+        
+        Args:
+            name: 设置项名称
+            
+        Returns:
+            设置值为1时返回True
+        """
+        stdout, _, _ = self.run_adb_shell(f"settings get global {name}")
+        return stdout.strip() == "1"
+    
+    def _get_wifi_enabled(self) -> bool:
+        """获取WiFi是否开启"""
+        cached = self._cached_network_field("wifi_enabled")
+        if cached is not None:
+            return cached
+        return self._get_global_setting_enabled("wifi_on")
+    
+    def _get_mobile_data_enabled(self) -> bool:
+        """获取移动数据是否开启"""
+        cached = self._cached_network_field("mobile_data_enabled")
+        if cached is not None:
+            return cached
+        return self._get_global_setting_enabled("mobile_data")
+    
+    def _get_airplane_mode(self) -> bool:
+        """获取飞行模式是否开启"""
+        cached = self._cached_network_field("airplane_mode")
+        if cached is not None:
+            return cached
+        return self._get_global_setting_enabled("airplane_mode_on")
+    
+    def _get_current_ssid(self) -> str:
+        """
+        获取当前连接的WiFi名称
+        
+        Returns:
+            WiFi名称，未连接时返回空字符串
+        """
+        stdout, _, _ = self.run_adb_shell("dumpsys wifi | grep 'mWifiInfo'")
+        match = _RE_WIFI_SSID.search(stdout)
+        return match.group(1).strip('"') if match else ""
     
     def get_ip_address(self) -> str:
         """
@@ -289,8 +475,9 @@ class SystemController(DeviceController):
         Returns:
             IP地址
         """
-        stdout, _, _ = self.run_adb_cmd("shell ip addr show wlan0 | grep 'inet ' | awk '{print $2}' | cut -d/ -f1")
-        return stdout.strip()
+        stdout, _, _ = self.run_adb_shell("ip -o -4 addr show wlan0")
+        match = _RE_IP.search(stdout)
+        return match.group(1) if match else ""
     
     def get_mac_address(self) -> str:
         """
@@ -299,8 +486,11 @@ class SystemController(DeviceController):
         Returns:
             MAC地址
         """
-        stdout, _, _ = self.run_adb_cmd("shell cat /sys/class/net/wlan0/address")
-        return stdout.strip()
+        def load_mac_address():
+            stdout, _, _ = self.run_adb_shell("cat /sys/class/net/wlan0/address")
+            return stdout.strip()
+            
+        return self._get_static("mac_address", load_mac_address)
     
     def get_dpi(self) -> int:
         """
@@ -309,11 +499,13 @@ class SystemController(DeviceController):
         Returns:
             DPI
         """
-        stdout, _, _ = self.run_adb_cmd("shell getprop ro.sf.lcd_density")
-        try:
-            return int(stdout.strip())
-        except ValueError:
-            return 0
+        def load_dpi():
+            try:
+                return int(self._props_get("ro.sf.lcd_density"))
+            except ValueError:
+                return 0
+                
+        return self._get_static("dpi", load_dpi)
             
     def list_devices(self) -> List[Dict[str, str]]:
         """
@@ -356,7 +548,7 @@ class SystemController(DeviceController):
         Returns:
             是否成功
         """
-        cmd = f"shell svc wifi {enable and 'enable' or 'disable'}"
+        cmd = f"shell svc wifi {'enable' if enable else 'disable'}"
         _, stderr, code = self.run_adb_cmd(cmd)
         
         if code != 0:
@@ -364,7 +556,8 @@ class SystemController(DeviceController):
             return False
             
         # 验证设置是否生效
-        current_status = self.get_network_info().get("wifi_enabled", False)
+        self._invalidate_network_info()
+        current_status = self._get_wifi_enabled()
         return current_status == enable
     
     def toggle_bluetooth(self, enable: bool) -> bool:
@@ -401,7 +594,7 @@ class SystemController(DeviceController):
         Returns:
             是否成功
         """
-        cmd = f"shell svc data {enable and 'enable' or 'disable'}"
+        cmd = f"shell svc data {'enable' if enable else 'disable'}"
         _, stderr, code = self.run_adb_cmd(cmd)
         
         if code != 0:
@@ -409,7 +602,8 @@ class SystemController(DeviceController):
             return False
             
         # 验证设置是否生效
-        current_status = self.get_network_info().get("mobile_data_enabled", False)
+        self._invalidate_network_info()
+        current_status = self._get_mobile_data_enabled()
         return current_status == enable
     
     def toggle_airplane_mode(self, enable: bool) -> bool:
@@ -423,7 +617,7 @@ class SystemController(DeviceController):
             是否成功
         """
         # 设置飞行模式状态
-        cmd1 = f"shell settings put global airplane_mode_on {enable and 1 or 0}"
+        cmd1 = f"shell settings put global airplane_mode_on {1 if enable else 0}"
         _, stderr1, code1 = self.run_adb_cmd(cmd1)
         
         if code1 != 0:
@@ -431,7 +625,7 @@ class SystemController(DeviceController):
             return False
             
         # 广播飞行模式变更事件
-        cmd2 = "shell am broadcast -a android.intent.action.AIRPLANE_MODE --ez state " + (enable and "true" or "false")
+        cmd2 = "shell am broadcast -a android.intent.action.AIRPLANE_MODE --ez state " + ("true" if enable else "false")
         _, stderr2, code2 = self.run_adb_cmd(cmd2)
         
         if code2 != 0:
@@ -439,7 +633,8 @@ class SystemController(DeviceController):
             return False
             
         # 验证设置是否生效
-        current_status = self.get_network_info().get("airplane_mode", False)
+        self._invalidate_network_info()
+        current_status = self._get_airplane_mode()
         return current_status == enable
     
     def connect_wifi(self, ssid: str, password: str = None, security_type: str = "WPA") -> bool:
@@ -455,26 +650,11 @@ class SystemController(DeviceController):
             是否成功
         """
         # 先确认WiFi已开启
-        if not self.get_network_info().get("wifi_enabled", False):
+        if not self._get_wifi_enabled():
             self.toggle_wifi(True)
             # 等待WiFi启动
             time.sleep(1)
-            
-        # 构建配置文件内容
-        if security_type.upper() == "NONE":
-            network_config = f'network={{\n\tssid="{ssid}"\n\tkey_mgmt=NONE\n}}\n'
-        elif security_type.upper() == "WEP":
-            network_config = f'network={{\n\tssid="{ssid}"\n\tkey_mgmt=NONE\n\twep_key0="{password}"\n}}\n'
-        else:  # WPA/WPA2
-            network_config = f'network={{\n\tssid="{ssid}"\n\tpsk="{password}"\n}}\n'
-            
-        # 创建临时文件
-        tmp_file = "/data/local/tmp/wifi_config.conf"
-        
-        # 写入配置到设备
-        echo_cmd = f"shell echo -e '{network_config}' > {tmp_file}"
-        self.run_adb_cmd(echo_cmd, shell=True)
-        
+
         # 添加网络配置
         cmd = f"shell wpa_cli -i wlan0 add_network"
         stdout, _, _ = self.run_adb_cmd(cmd)
@@ -503,61 +683,76 @@ class SystemController(DeviceController):
         
         # 保存配置
         self.run_adb_cmd("shell wpa_cli -i wlan0 save_config")
-        
-        # 删除临时文件
-        self.run_adb_cmd(f"shell rm {tmp_file}")
-        
-        # 等待连接
-        max_tries = 10
-        for i in range(max_tries):
-            time.sleep(1)
-            current_wifi = self.get_network_info().get("wifi_name", "")
-            if current_wifi == ssid:
+        self._invalidate_network_info()
+
+        # 等待连接，轮询间隔指数增长，连接成功后立即返回
+        deadline = time.monotonic() + WIFI_CONNECT_TIMEOUT
+        delay = 0.2
+        while time.monotonic() < deadline:
+            if self._get_current_ssid() == ssid:
                 return True
+            time.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * 1.5, 1.5)
                 
-        return False
+        return self._get_current_ssid() == ssid
     
-    def get_wifi_info(self) -> Dict[str, Any]:
+    def get_wifi_info(self, use_cache: bool = True) -> Dict[str, Any]:
         """
         获取当前WiFi详细信息
         
+        Args:
+            use_cache: 是否使用未过期(WIFI_INFO_TTL内)的缓存结果
+            
         Returns:
             WiFi信息 {ssid, bssid, rssi, ip_address, link_speed, frequency}
         """
+        wifi_info = self._wifi_info
+        if use_cache and wifi_info is not None and time.monotonic() - self._wifi_info_ts < WIFI_INFO_TTL:
+            return wifi_info
+            
+        wifi_info = self._query_wifi_info()
+        self._wifi_info = wifi_info
+        self._wifi_info_ts = time.monotonic()
+        return wifi_info
+    
+    def _query_wifi_info(self) -> Dict[str, Any]:
+        """从设备查询WiFi详细信息"""
         # 确认WiFi是否已开启
-        if not self.get_network_info().get("wifi_enabled", False):
+        if not self._get_wifi_enabled():
             return {}
             
         wifi_info = {}
         
         # 获取WiFi信息
-        stdout, _, _ = self.run_adb_cmd("shell dumpsys wifi | grep -A 10 'mWifiInfo'")
-        lines = stdout.strip().split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if "SSID: " in line:
-                match = re.search(r'SSID: (.*?)[,}]', line)
-                if match:
-                    wifi_info["ssid"] = match.group(1).strip('"')
-            elif "BSSID: " in line:
-                match = re.search(r'BSSID: (.*?)[,}]', line)
-                if match:
-                    wifi_info["bssid"] = match.group(1)
-            elif "RSSI: " in line:
-                match = re.search(r'RSSI: (.*?)[,}]', line)
-                if match:
-                    wifi_info["rssi"] = int(match.group(1))
-            elif "Link speed: " in line:
-                match = re.search(r'Link speed: (.*?)[,}]', line)
-                if match:
-                    wifi_info["link_speed"] = match.group(1)
-            elif "Frequency: " in line:
-                match = re.search(r'Frequency: (.*?)[,}]', line)
-                if match:
-                    wifi_info["frequency"] = match.group(1)
+        needed = {field for field, _ in _WIFI_FIELDS.values()}
+        with closing(self.run_adb_cmd_lines("shell dumpsys wifi | grep -A 10 'mWifiInfo'")) as lines:
+            for line in lines:
+                for key, value in _RE_WIFI_KV.findall(line):
+                    field, convert = _WIFI_FIELDS[key]
+                    # 同一字段只取第一次出现的值
+                    if field not in needed:
+                        continue
+                    try:
+                        wifi_info[field] = convert(value.strip())
+                    except ValueError:
+                        continue
+                    needed.discard(field)
+                    
+                # 所需字段全部取到后即停止读取
+                if not needed:
+                    break
                     
         # 获取IP地址
         wifi_info["ip_address"] = self.get_ip_address()
             
-        return wifi_info 
\ No newline at end of file
+        return wifi_info
+    
+    def cleanup(self):
+        """
+        清理控制器资源，在服务关闭时调用
+        """
+        with self._io_pool_lock:
+            if self._io_pool is not None:
+                self._io_pool.shutdown(wait=False)
+                self._io_pool = None
+        super().cleanup()
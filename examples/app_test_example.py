@@ -7,26 +7,36 @@ MCPDroid 应用测试示例
 import sys
 import json
 import time
+import itertools
 import requests
+from requests.adapters import HTTPAdapter
 import argparse
 
 
 # 服务器地址配置
 MCP_SERVER_URL = "http://localhost:8000/jsonrpc"
 
+# 请求id生成器，保证id唯一且递增
+_ID = itertools.count(1)
+
+# 请求头
+_HEADERS = {"Content-Type": "application/json"}
+
+# 复用同一个HTTP会话，保持与服务器的长连接
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
 
 def call_jsonrpc(method, params=None):
     """调用JSON-RPC方法"""
-    headers = {"Content-Type": "application/json"}
-    
     payload = {
         "jsonrpc": "2.0",
-        "id": int(time.time() * 1000),
+        "id": next(_ID),
         "method": method,
         "params": params or {}
     }
     
-    response = requests.post(MCP_SERVER_URL, headers=headers, json=payload)
+    response = _SESSION.post(MCP_SERVER_URL, headers=_HEADERS, json=payload)
     data = response.json()
     
     if "error" in data:
@@ -116,6 +126,17 @@ def tap_screen(x, y, is_percent=True):
     return False
 
 
+def run_script(steps, is_percent=True):
+    """在服务端一次性执行一组点击步骤，替代多次tap+sleep往返"""
+    result = call_tool("run_gesture_script", {
+        "steps": steps,
+        "is_percent": is_percent
+    })
+    if result:
+        return result.get("success", False)
+    return False
+
+
 def type_text(text):
     """输入文本"""
     result = call_tool("type_text", {"text": text})
@@ -155,17 +176,19 @@ def test_calculator_app():
         "com.oppo.calculator"  # OPPO
     ]
     
-    # 查找已安装的计算器应用
-    calculator_package = None
-    for package in calculator_packages:
-        if check_app_installed(package):
-            calculator_package = package
-            print(f"找到计算器应用: {package}")
-            break
+    # 一次获取全部已安装包名，在本地查找计算器应用
+    result = call_tool("list_apps", {
+        "system_apps": True,
+        "third_party_apps": True,
+        "with_names": False
+    })
+    installed = {app["package_name"] for app in (result or {}).get("apps", [])}
+    calculator_package = next((p for p in calculator_packages if p in installed), None)
     
     if not calculator_package:
         print("未找到计算器应用，请指定包名")
         return False
+    print(f"找到计算器应用: {calculator_package}")
     
     # 启动计算器应用
     print("启动计算器应用...")
@@ -184,22 +207,14 @@ def test_calculator_app():
     # 注意: 这只是示例，实际应用中应该结合图像识别或UI元素定位
     print("进行简单计算: 1 + 2 = 3")
     
-    # 点击数字1
-    tap_screen(0.2, 0.6)
-    time.sleep(0.5)
-    
-    # 点击加号
-    tap_screen(0.8, 0.6)
-    time.sleep(0.5)
-    
-    # 点击数字2
-    tap_screen(0.2, 0.7)
-    time.sleep(0.5)
-    
-    # 点击等号
-    tap_screen(0.8, 0.8)
-    time.sleep(1)
-    
+    # 依次点击 1、+、2、=，一次调用完成
+    run_script([
+        {"action": "tap", "x": 0.2, "y": 0.6, "delay_ms": 500},  # 数字1
+        {"action": "tap", "x": 0.8, "y": 0.6, "delay_ms": 500},  # 加号
+        {"action": "tap", "x": 0.2, "y": 0.7, "delay_ms": 500},  # 数字2
+        {"action": "tap", "x": 0.8, "y": 0.8, "delay_ms": 1000},  # 等号
+    ])
+
     # 截取计算结果截图
     print("截取计算结果截图")
     take_screenshot()
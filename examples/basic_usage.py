@@ -6,13 +6,28 @@ MCPDroid基本使用示例
 """
 import sys
 import json
-import time
+import itertools
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
 
 
 # 服务器地址配置
 MCP_SERVER_URL = "http://localhost:8000/jsonrpc"
 
+# 请求id生成器，保证id唯一且递增
+_ID = itertools.count(1)
+
+# 请求头
+_HEADERS = {
+    "Content-Type": "application/json",
+}
+
+# 复用同一个HTTP会话，保持与服务器的长连接
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
 
 def call_jsonrpc(method, params=None):
     """
@@ -25,19 +40,44 @@ def call_jsonrpc(method, params=None):
     Returns:
         响应结果或错误信息
     """
-    headers = {
-        "Content-Type": "application/json",
+    payload = {
+        "jsonrpc": "2.0",
+        "id": next(_ID),
+        "method": method,
+        "params": params or {}
     }
     
+    response = _SESSION.post(MCP_SERVER_URL, headers=_HEADERS, json=payload)
+    data = response.json()
+    
+    if "error" in data:
+        print(f"错误: {data['error']['message']}")
+        return None
+        
+    return data.get("result")
+
+
+async def call_jsonrpc_async(session, method, params=None):
+    """
+    异步调用JSON-RPC方法，可与其他调用并发执行
+    
+    Args:
+        session: aiohttp会话
+        method: 方法名称
+        params: 参数字典
+        
+    Returns:
+        响应结果或错误信息
+    """
     payload = {
         "jsonrpc": "2.0",
-        "id": int(time.time() * 1000),
+        "id": next(_ID),
         "method": method,
         "params": params or {}
     }
     
-    response = requests.post(MCP_SERVER_URL, headers=headers, json=payload)
-    data = response.json()
+    async with session.post(MCP_SERVER_URL, json=payload) as response:
+        data = await response.json()
     
     if "error" in data:
         print(f"错误: {data['error']['message']}")
@@ -46,6 +86,40 @@ def call_jsonrpc(method, params=None):
     return data.get("result")
 
 
+async def call_tool_async(session, name, parameters=None):
+    """
+    异步调用工具
+    
+    Args:
+        session: aiohttp会话
+        name: 工具名称
+        parameters: 工具参数
+        
+    Returns:
+        工具调用结果
+    """
+    result = await call_jsonrpc_async(session, "tools/call", {
+        "name": name,
+        "parameters": parameters or {}
+    })
+    
+    if result:
+        return result.get("result")
+    return None
+
+
+async def fetch_demo_results():
+    """并发调用演示所需的各个相互独立的工具"""
+    async with aiohttp.ClientSession() as session:
+        return await asyncio.gather(
+            call_tool_async(session, "get_device_info"),
+            call_tool_async(session, "get_screen_size"),
+            call_tool_async(session, "get_battery_info"),
+            call_tool_async(session, "take_screenshot", {"resize_ratio": 0.5}),
+            call_tool_async(session, "list_apps", {"third_party_apps": True, "system_apps": False})
+        )
+
+
 def initialize_session():
     """初始化MCP会话"""
     result = call_jsonrpc("initialize", {
@@ -108,37 +182,33 @@ def main():
     for tool in tools:
         print(f"- {tool['name']}: {tool['description']}")
     
-    # 基本功能演示
+    # 基本功能演示，以下工具调用相互独立，并发发出
     print("\n基本功能演示:")
+    device_info, screen_size, battery_info, screenshot, app_list = asyncio.run(fetch_demo_results())
     
     # 获取设备信息
     print("\n1. 获取设备信息")
-    device_info = call_tool("get_device_info")
     if device_info:
         print(f"设备信息: {json.dumps(device_info, indent=2, ensure_ascii=False)}")
     
     # 获取屏幕尺寸
     print("\n2. 获取屏幕尺寸")
-    screen_size = call_tool("get_screen_size")
     if screen_size:
         print(f"屏幕尺寸: {screen_size['width']}x{screen_size['height']}")
     
     # 获取电池信息
     print("\n3. 获取电池信息")
-    battery_info = call_tool("get_battery_info")
     if battery_info:
         print(f"电池信息: {json.dumps(battery_info, indent=2, ensure_ascii=False)}")
     
     # 截取屏幕截图
     print("\n4. 截取屏幕截图")
-    screenshot = call_tool("take_screenshot", {"resize_ratio": 0.5})
     if screenshot:
         print(f"截图已保存: {screenshot['path']}")
         print(f"访问URL: {screenshot['url']}")
     
     # 列出已安装应用
     print("\n5. 列出已安装应用(前5个)")
-    app_list = call_tool("list_apps", {"third_party_apps": True, "system_apps": False})
     if app_list and app_list.get("apps"):
         for i, app in enumerate(app_list["apps"][:5]):
             print(f"  {i+1}. {app['app_name']} ({app['package_name']})")
@@ -5,30 +5,88 @@ MCPDroid图像识别示例
 此示例演示如何使用MCPDroid服务的图像识别功能。
 """
 import sys
+import io
 import json
 import time
 import os
-import requests
-from PIL import Image, ImageDraw
+import base64
+import struct
+import hashlib
+import argparse
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 
 # 服务器地址配置
 MCP_SERVER_URL = "http://localhost:8000/jsonrpc"
 
+# 请求超时时间(秒)，图像识别可能需要较长时间
+REQUEST_TIMEOUT = 60
+
+# 并发调用相互独立的请求时使用的最大线程数，不超过连接池大小
+PARALLEL_WORKERS = 4
+
+# 等待屏幕稳定时，首张截图之后最多再截取的次数
+STABLE_MAX_SHOTS = 4
+
+# 请求头
+_HEADERS = {"Content-Type": "application/json", "Connection": "keep-alive"}
+
+# 复用同一个HTTP会话，保持与服务器的长连接，首次请求时创建
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+# JSON-RPC请求体模板，id、method、params在调用时填入
+_PAYLOAD_TEMPLATE = b'{"jsonrpc":"2.0","id":%d,"method":%b,"params":%b}'
+
+# 请求id生成器，保证id唯一且递增
+_ID = itertools.count(1)
+
+# 模板图像缓存 {图像路径: (文件内容, (w, h), MD5)}，同一模板只读取一次
+_TEMPLATE_CACHE = {}
+
+
+def _json_dumps(obj):
+    """序列化为紧凑的JSON字节串，优先使用orjson"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _json_loads(data):
+    """解析JSON字节串，优先使用orjson"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _get_session():
+    """获取共享的HTTP会话，首次调用时导入requests并创建"""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+                _SESSION = session
+    return _SESSION
+
 
 def call_jsonrpc(method, params=None):
     """调用JSON-RPC方法"""
-    headers = {"Content-Type": "application/json"}
-    
-    payload = {
-        "jsonrpc": "2.0",
-        "id": int(time.time() * 1000),
-        "method": method,
-        "params": params or {}
-    }
+    body = _PAYLOAD_TEMPLATE % (next(_ID), _json_dumps(method), _json_dumps(params or {}))
     
-    response = requests.post(MCP_SERVER_URL, headers=headers, json=payload)
-    data = response.json()
+    response = _get_session().post(MCP_SERVER_URL, headers=_HEADERS, data=body, timeout=REQUEST_TIMEOUT)
+    data = _json_loads(response.content)
     
     if "error" in data:
         print(f"错误: {data['error']['message']}")
@@ -37,6 +95,23 @@ def call_jsonrpc(method, params=None):
     return data.get("result")
 
 
+def run_parallel(tasks):
+    """
+    并发执行多个相互独立的调用
+    
+    Args:
+        tasks: (函数, 参数元组)列表
+        
+    Returns:
+        与tasks顺序一致的返回值列表
+    """
+    if not tasks:
+        return []
+    with ThreadPoolExecutor(max_workers=min(PARALLEL_WORKERS, len(tasks))) as pool:
+        futures = [pool.submit(func, *args) for func, args in tasks]
+        return [future.result() for future in futures]
+
+
 def call_tool(name, parameters=None):
     """调用工具"""
     result = call_jsonrpc("tools/call", {
@@ -64,27 +139,130 @@ def initialize_session():
     return False
 
 
-def capture_reference_image(target_path):
+def _screenshot_digest():
+    """截取屏幕并返回整个截图文件的MD5，截图失败时返回None"""
+    screenshot = call_tool("take_screenshot")
+    if not screenshot:
+        return None
+    with open(screenshot["path"], "rb") as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def wait_for_screen_stable(max_wait=None, poll=0.05):
+    """
+    等待屏幕内容稳定，连续两次截图一致时立即返回
+    
+    Args:
+        max_wait: 首张截图之后的最长等待时间(秒)，为None时按首张截图的实际耗时估算，
+                  保证最多可再截取STABLE_MAX_SHOTS次
+        poll: 两次截图之间的间隔(秒)
+        
+    Returns:
+        屏幕是否已稳定
+    """
+    start = time.monotonic()
+    previous = _screenshot_digest()
+    now = time.monotonic()
+    if max_wait is None:
+        max_wait = STABLE_MAX_SHOTS * (now - start + poll)
+    deadline = now + max_wait
+    while time.monotonic() < deadline:
+        time.sleep(poll)
+        current = _screenshot_digest()
+        if current is not None and current == previous:
+            return True
+        previous = current
+    return False
+
+
+def _png_size(data):
+    """
+    从PNG文件头读取图像尺寸，无需解码图像
+    
+    Args:
+        data: 图像文件内容
+        
+    Returns:
+        (w, h)，不是PNG格式时返回None
+    """
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        return None
+    return struct.unpack(">II", data[16:24])
+
+
+def _load_template(path):
+    """
+    读取模板图像文件，结果按路径缓存
+    
+    Args:
+        path: 图像路径
+        
+    Returns:
+        (文件内容, (w, h), MD5)
+    """
+    cached = _TEMPLATE_CACHE.get(path)
+    if cached is None:
+        with open(path, "rb") as f:
+            raw = f.read()
+        size = _png_size(raw)
+        if size is None:
+            from PIL import Image
+            size = Image.open(io.BytesIO(raw)).size
+        cached = (raw, size, hashlib.md5(raw).hexdigest())
+        _TEMPLATE_CACHE[path] = cached
+    return cached
+
+
+def _target_params(target):
+    """
+    构建目标图像参数
+    
+    Args:
+        target: 目标图像路径，或capture_reference_image返回的内存图像
+        
+    Returns:
+        image_recognition工具的目标图像参数
+    """
+    if isinstance(target, dict):
+        return {"target_image_b64": target["b64"], "target_image_hash": target["hash"]}
+    _, _, digest = _load_template(target)
+    return {"target_image_path": target, "target_image_hash": digest}
+
+
+def _target_size(target):
+    """获取目标图像尺寸 (w, h)"""
+    if isinstance(target, dict):
+        return target["size"]
+    return _load_template(target)[1]
+
+
+def capture_reference_image(target_path=None):
     """
     截取参考图像
     
+    参考图像保存在内存中，以base64形式直接发送给服务端，不经过磁盘读写；
+    指定target_path时额外保存一份到文件，以低压缩级别保存以减少编码开销
+    
     Args:
-        target_path: 保存路径
+        target_path: 保存路径，为None时不保存文件
     
     Returns:
-        是否成功
+        参考图像 {b64, size, hash}，失败时返回None
     """
     screenshot = call_tool("take_screenshot")
     if not screenshot:
-        return False
+        return None
     
-    # 文件已经保存到本地，只要复制即可
+    import numpy as np
+    from PIL import Image
+    
+    # 截图文件已经保存到本地，直接读取
     try:
-        # 打开截图
-        img = Image.open(screenshot["path"])
+        # 打开截图，以数组形式访问像素
+        arr = np.asarray(Image.open(screenshot["path"]))
         
         # 获取屏幕尺寸
-        width, height = img.size
+        height, width = arr.shape[:2]
         
         # 裁剪屏幕中央部分区域作为参考图像
         # 这里裁剪中央1/9区域，可以根据实际需要调整
@@ -95,53 +273,67 @@ def capture_reference_image(target_path):
         right = left + crop_width
         bottom = top + crop_height
         
-        # 裁剪图像
-        cropped_img = img.crop((left, top, right, bottom))
+        # 裁剪图像，切片只是原数组的视图，编码前再转为连续内存
+        cropped = arr[top:bottom, left:right]
+        cropped_img = Image.fromarray(np.ascontiguousarray(cropped))
+        
+        # BMP无压缩，编码开销最小
+        buf = io.BytesIO()
+        cropped_img.save(buf, format="BMP")
+        raw = buf.getvalue()
+        reference = {
+            "b64": base64.b64encode(raw).decode("ascii"),
+            "size": cropped_img.size,
+            "hash": hashlib.md5(raw).hexdigest()
+        }
         
         # 保存参考图像
-        cropped_img.save(target_path)
-        print(f"参考图像已保存: {target_path}")
+        if target_path:
+            cropped_img.save(target_path, optimize=False, compress_level=1)
+            print(f"参考图像已保存: {target_path}")
         print(f"区域: 左={left}, 上={top}, 右={right}, 下={bottom}")
-        return True
+        return reference
     except Exception as e:
-        print(f"保存参考图像失败: {str(e)}")
-        return False
+        print(f"截取参考图像失败: {str(e)}")
+        return None
 
 
-def find_image_on_screen(target_image_path, threshold=0.7, timeout=10):
+def find_image_on_screen(target, threshold=0.7, timeout=10, save_screenshot=False):
     """
     在屏幕上查找图像
     
     Args:
-        target_image_path: 目标图像路径
+        target: 目标图像路径，或capture_reference_image返回的内存图像
         threshold: 匹配阈值，默认0.7
         timeout: 超时时间，默认10秒
+        save_screenshot: 是否同时返回匹配时使用的截图
         
     Returns:
         匹配结果或None
     """
     result = call_tool("image_recognition", {
-        "target_image_path": target_image_path,
+        **_target_params(target),
         "threshold": threshold,
-        "timeout": timeout
+        "timeout": timeout,
+        "save_screenshot": save_screenshot
     })
     
     return result
 
 
-def tap_image_if_found(target_image_path, threshold=0.7, timeout=10):
+def tap_image_if_found(target, threshold=0.7, timeout=10):
     """
     找到并点击图像
     
     Args:
-        target_image_path: 目标图像路径
+        target: 目标图像路径，或capture_reference_image返回的内存图像
         threshold: 匹配阈值，默认0.7
         timeout: 超时时间，默认10秒
         
     Returns:
         是否成功点击图像
     """
-    result = find_image_on_screen(target_image_path, threshold, timeout)
+    result = find_image_on_screen(target, threshold, timeout)
     
     if result and result.get("found"):
         position = result.get("position", {})
@@ -159,50 +351,58 @@ def tap_image_if_found(target_image_path, threshold=0.7, timeout=10):
     return False
 
 
-def take_screenshot_and_mark_match(target_image_path, output_path):
+def take_screenshot_and_mark_match(target, output_path):
     """
     截取屏幕并标记匹配位置
     
     Args:
-        target_image_path: 目标图像路径
+        target: 目标图像路径，或capture_reference_image返回的内存图像
         output_path: 输出图像路径
         
     Returns:
         是否成功
     """
-    # 先截取屏幕
-    screenshot = call_tool("take_screenshot")
-    if not screenshot:
-        return False
-    
-    # 查找图像位置
-    result = find_image_on_screen(target_image_path)
+    # 查找图像位置，并直接使用服务端匹配时的截图，无需再单独截图
+    result = find_image_on_screen(target, save_screenshot=True)
     if not result or not result.get("found"):
         print("未找到匹配图像")
         return False
+    screenshot = result["screenshot"]
+    
+    import numpy as np
+    from PIL import Image, ImageDraw
     
     try:
-        # 打开截图
+        # 打开截图，已是RGB时不再额外转换，像素只复制一次到可写数组
         img = Image.open(screenshot["path"])
-        draw = ImageDraw.Draw(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        arr = np.array(img)
+        height, width = arr.shape[:2]
         
         # 获取匹配位置
         position = result.get("position", {})
-        x, y = position.get("x", 0), position.get("y", 0)
+        x, y = int(position.get("x", 0)), int(position.get("y", 0))
         
-        # 打开目标图像以获取尺寸
-        target_img = Image.open(target_image_path)
-        w, h = target_img.size
+        # 获取目标图像尺寸
+        w, h = _target_size(target)
         
-        # 在截图上绘制矩形标记匹配位置
-        draw.rectangle([(x - w // 2, y - h // 2), (x + w // 2, y + h // 2)], outline="red", width=5)
+        # 在截图上绘制矩形标记匹配位置，四条边直接对数组切片赋值
+        x0, y0 = max(x - w // 2, 0), max(y - h // 2, 0)
+        x1, y1 = min(x + w // 2, width), min(y + h // 2, height)
+        red = (255, 0, 0)
+        arr[y0:y0 + 5, x0:x1] = red
+        arr[max(y1 - 5, y0):y1, x0:x1] = red
+        arr[y0:y1, x0:x0 + 5] = red
+        arr[y0:y1, max(x1 - 5, x0):x1] = red
         
-        # 在匹配位置附近标注置信度
+        # 标记完成后转换回PIL图像一次，用于标注置信度并保存
+        img = Image.fromarray(arr)
         confidence = result.get("confidence", 0)
-        draw.text((x, y + h // 2 + 10), f"Confidence: {confidence:.2f}", fill="red")
+        ImageDraw.Draw(img).text((x, y + h // 2 + 10), f"Confidence: {confidence:.2f}", fill="red")
         
-        # 保存标记后的图像
-        img.save(output_path)
+        # 保存标记后的图像，仅供预览，使用JPEG以降低编码开销
+        img.save(output_path, format="JPEG", quality=85, subsampling=2)
         print(f"标记后的图像已保存: {output_path}")
         return True
     except Exception as e:
@@ -212,11 +412,16 @@ def take_screenshot_and_mark_match(target_image_path, output_path):
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="MCPDroid图像识别示例")
+    parser.add_argument("--save", action="store_true", help="将参考图像另存到examples/images/reference.png")
+    args = parser.parse_args()
+    
     print("MCPDroid 图像识别示例")
     print("======================\n")
     
     # 创建保存目录
-    os.makedirs("examples/images", exist_ok=True)
+    if not os.path.isdir("examples/images"):
+        os.makedirs("examples/images")
     
     # 初始化会话
     if not initialize_session():
@@ -228,15 +433,21 @@ def main():
     
     # 步骤1: 截取参考图像
     print("\n1. 截取参考图像")
-    reference_image_path = "examples/images/reference.png"
-    if not capture_reference_image(reference_image_path):
+    reference_image_path = "examples/images/reference.png" if args.save else None
+    reference = capture_reference_image(reference_image_path)
+    if not reference:
         print("截取参考图像失败")
         return 1
     
-    # 步骤2: 查找图像
+    # 步骤2与步骤3: 查找图像并标记匹配位置，两者只读取屏幕、互不依赖，并发执行
     print("\n2. 在屏幕上查找参考图像")
-    time.sleep(1)  # 稍等片刻
-    result = find_image_on_screen(reference_image_path)
+    print("3. 标记匹配位置")
+    wait_for_screen_stable()
+    marked_image_path = "examples/images/marked_match.jpg"
+    result, _ = run_parallel([
+        (find_image_on_screen, (reference,)),
+        (take_screenshot_and_mark_match, (reference, marked_image_path))
+    ])
     if result and result.get("found"):
         position = result.get("position", {})
         confidence = result.get("confidence", 0)
@@ -244,14 +455,9 @@ def main():
     else:
         print("未找到匹配图像")
     
-    # 步骤3: 标记匹配位置
-    print("\n3. 标记匹配位置")
-    marked_image_path = "examples/images/marked_match.png"
-    take_screenshot_and_mark_match(reference_image_path, marked_image_path)
-    
-    # 步骤4: 点击匹配位置
+    # 步骤4: 点击匹配位置（会改变屏幕内容，须在OCR之前单独执行）
     print("\n4. 点击匹配位置")
-    if tap_image_if_found(reference_image_path):
+    if tap_image_if_found(reference):
         print("成功点击匹配图像")
     else:
         print("点击匹配图像失败")
@@ -4,13 +4,11 @@ MCPDroid 主程序入口
 """
 import os
 import sys
+import json
+import shutil
 import logging
 import argparse
-from fastapi.staticfiles import StaticFiles
-from fastapi import FastAPI
-
-from core.mcp_server import MCPServer
-from tools.android_tools import register_android_tools
+import threading
 
 # 日志配置
 logging.basicConfig(
@@ -19,6 +17,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger("main")
 
+# ADB版本检查结果缓存文件，ADB程序未变化时跳过检查
+ADB_VERSION_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "mcp_droid", "adb_version")
+
+# 等待后台ADB检查完成的最长时间(秒)
+ADB_PROBE_TIMEOUT = 1.0
+
+# 执行adb version的超时时间(秒)，避免ADB卡死时探测线程一直阻塞
+ADB_VERSION_TIMEOUT = 5
+
 
 def parse_args():
     """解析命令行参数"""
@@ -31,49 +38,111 @@ def parse_args():
     return parser.parse_args()
 
 
+def ensure_dirs(*paths: str):
+    """
+    确保目录存在，已存在的目录只做一次stat
+    
+    Args:
+        paths: 目录路径
+    """
+    for path in paths:
+        try:
+            os.stat(path)
+        except FileNotFoundError:
+            os.makedirs(path, exist_ok=True)
+
+
+def check_adb(adb_path: str, result: dict):
+    """
+    检查ADB是否可用，结果按(ADB路径, 修改时间)缓存到磁盘
+    
+    Args:
+        adb_path: ADB命令路径
+        result: 用于返回结果的字典，写入ok与version或error
+    """
+    import subprocess
+    
+    try:
+        resolved = shutil.which(adb_path)
+        if not resolved:
+            result.update(ok=False, error=f"未找到ADB命令: {adb_path}")
+            return
+            
+        cache_key = f"{resolved}:{os.path.getmtime(resolved)}"
+        try:
+            with open(ADB_VERSION_CACHE, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("key") == cache_key:
+                result.update(ok=True, version=cached["version"])
+                return
+        except (OSError, ValueError, KeyError):
+            pass
+            
+        try:
+            proc = subprocess.run([resolved, "version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                  timeout=ADB_VERSION_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            result.update(ok=False, error=f"ADB命令执行超时({ADB_VERSION_TIMEOUT}秒): {resolved}")
+            return
+            
+        if proc.returncode != 0:
+            result.update(ok=False, error=f"ADB命令不可用: {proc.stderr.decode(errors='replace')}")
+            return
+            
+        version = proc.stdout.decode(errors="replace").strip()
+        result.update(ok=True, version=version)
+        
+        try:
+            os.makedirs(os.path.dirname(ADB_VERSION_CACHE), exist_ok=True)
+            with open(ADB_VERSION_CACHE, "w", encoding="utf-8") as f:
+                json.dump({"key": cache_key, "version": version}, f)
+        except OSError:
+            pass
+    except Exception as e:
+        result.update(ok=False, error=f"检查ADB失败: {str(e)}")
+
+
 def main():
     """主函数"""
     args = parse_args()
     
+    # 参数解析完成后再导入服务端依赖，--help或参数错误时无需加载FastAPI
+    from fastapi.staticfiles import StaticFiles
+    from core.mcp_server import MCPServer
+    from tools.android_tools import register_android_tools
+    
     # 设置日志级别
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
         logger.debug("调试模式已开启")
     
-    # 检查ADB是否可用
-    try:
-        import subprocess
-        result = subprocess.run(
-            [args.adb_path, "version"], 
-            capture_output=True, 
-            text=True
-        )
-        if result.returncode != 0:
-            logger.error(f"ADB命令不可用: {result.stderr}")
-            return 1
-            
-        logger.info(f"ADB版本: {result.stdout.strip()}")
-    except Exception as e:
-        logger.error(f"检查ADB失败: {str(e)}")
-        return 1
+    # 在后台检查ADB是否可用，与服务器初始化并行进行
+    adb_status = {}
+    adb_probe = threading.Thread(target=check_adb, args=(args.adb_path, adb_status), daemon=True)
+    adb_probe.start()
     
     # 创建服务器实例
     server = MCPServer()
     
-    # 确保静态目录及子目录存在
+    # 静态目录及截图子目录在首次保存截图时创建
     static_dir = os.path.join(os.path.dirname(__file__), "static")
-    os.makedirs(static_dir, exist_ok=True)
-    
-    # 确保截图目录存在
-    screenshot_dir = os.path.join(static_dir, "screenshot")
-    os.makedirs(screenshot_dir, exist_ok=True)
     
     # 确保日志目录存在
     logs_dir = os.path.join(os.path.dirname(__file__), "logs")
-    os.makedirs(logs_dir, exist_ok=True)
+    ensure_dirs(logs_dir)
+    
+    # 配置静态文件服务，目录可能尚未创建，不在挂载时检查
+    server.app.mount("/static", StaticFiles(directory=static_dir, check_dir=False), name="static")
     
-    # 配置静态文件服务
-    server.app.mount("/static", StaticFiles(directory=static_dir), name="static")
+    # 注册工具前确认ADB可用
+    adb_probe.join(timeout=ADB_PROBE_TIMEOUT)
+    if adb_probe.is_alive():
+        logger.warning("ADB检查尚未完成，继续启动")
+    elif not adb_status.get("ok"):
+        logger.error(adb_status.get("error", "检查ADB失败"))
+        return 1
+    else:
+        logger.info(f"ADB版本: {adb_status['version']}")
     
     # 注册Android工具
     register_android_tools(server, args.adb_path, args.device_id)
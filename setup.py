@@ -27,6 +27,8 @@ setup(
         "fastapi>=0.95.0",
         "uvicorn>=0.22.0",
         "pydantic>=2.0.0",
+        "msgspec>=0.18.0",
+        "fastjsonschema>=2.16.0",
         "pillow>=9.0.0",
     ],
     extras_require={
@@ -34,6 +36,7 @@ setup(
             "opencv-python>=4.7.0",
             "airtest>=1.2.7",
             "pytesseract>=0.3.10",
+            "orjson>=3.8.0",
         ],
     },
     entry_points={
@@ -3,14 +3,19 @@ Android设备控制MCP工具实现
 """
 import os
 import json
+import shlex
 import logging
-import inspect
+import functools
+import threading
 import subprocess
-from typing import Dict, List, Any, Optional, Callable, Union
+from types import MappingProxyType, MethodType
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Callable, Union, Tuple
+import fastjsonschema
 from pydantic import BaseModel, Field, create_model
 
 # 修改为相对导入
-from ..core.mcp_server import MCPTool
+from ..core.mcp_server import MCPTool, MCPError
 from ..core.device_controller import DeviceController
 from ..core.app_controller import AppController
 from ..core.system_controller import SystemController
@@ -19,13 +24,202 @@ from ..core.multi_device_controller import MultiDeviceController
 
 logger = logging.getLogger("android_tools")
 
+# 滑动方向分派表 {方向: 滑动方法}
+_SLIDE_DISPATCH = {
+    "up": DeviceController.slide_up,
+    "down": DeviceController.slide_down
+}
+
+# 固定内容的错误响应，只读共享，避免每次调用重新构造
+_INVALID_SLIDE_DIRECTION_ERR = MappingProxyType({"success": False, "error": "无效的滑动方向，应为up或down"})
+_EMPTY_SSID_ERR = MappingProxyType({"success": False, "message": "WiFi名称不能为空"})
+
+# 仅含执行结果的响应 {"success": bool}，成功/失败各共享一个只读实例
+_OK = MappingProxyType({"success": True})
+_FAIL = MappingProxyType({"success": False})
+
+# 单设备控制器类型，按下标对应AndroidTools的设备、应用、系统、高级功能控制器
+_CONTROLLER_CLASSES = (DeviceController, AppController, SystemController, AdvancedController)
+
+# 手势脚本单个步骤的Schema：点击(action可省略)或滑动，坐标必填且为数值
+_GESTURE_STEP_SCHEMA = {
+    "oneOf": [
+        {
+            "type": "object",
+            "properties": {
+                "action": {"enum": ["tap"]},
+                "x": {"type": "number"},
+                "y": {"type": "number"},
+                "delay_ms": {"type": "integer", "minimum": 0}
+            },
+            "required": ["x", "y"]
+        },
+        {
+            "type": "object",
+            "properties": {
+                "action": {"enum": ["swipe"]},
+                "x1": {"type": "number"},
+                "y1": {"type": "number"},
+                "x2": {"type": "number"},
+                "y2": {"type": "number"},
+                "duration": {"type": "integer", "minimum": 0},
+                "delay_ms": {"type": "integer", "minimum": 0}
+            },
+            "required": ["action", "x1", "y1", "x2", "y2"]
+        }
+    ]
+}
+
+# 多设备执行命令时的最大并发数
+MULTI_DEVICE_MAX_WORKERS = 32
+
+# 多设备执行命令时单个设备的超时时间(秒)
+MULTI_DEVICE_CMD_TIMEOUT = 30
+
+
+# 视为真值的参数取值，兼容以字符串或数字传递的布尔参数
+_TRUTHY = frozenset({"true", "1", "yes", "on"})
+
+
+def _coerce_bool(value: Any) -> bool:
+    """
+    将布尔参数统一转换为bool，已是bool时直接返回
+    
+    Args:
+        value: 参数值
+        
+    Returns:
+        布尔值
+    """
+    if type(value) is bool:
+        return value
+    return str(value).strip().lower() in _TRUTHY
+
+
+def _get_enable(params: Dict[str, Any]) -> bool:
+    """
+    读取开关类工具的enable参数，默认True；True/False为单例，直接比较身份即可
+    
+    Args:
+        params: 工具参数
+        
+    Returns:
+        布尔值
+    """
+    value = params.get("enable", True)
+    if value is True or value is False:
+        return value
+    return _coerce_bool(value)
+
+
+def _make_extractor(keys: Tuple[str, ...], defaults: Tuple[Any, ...]) -> Callable[[Dict[str, Any]], Tuple[Any, ...]]:
+    """
+    生成参数提取函数，按顺序一次取出多个参数，缺失的参数使用对应默认值
+    
+    Args:
+        keys: 参数名
+        defaults: 与参数名一一对应的默认值
+        
+    Returns:
+        提取函数 extract(params) -> 参数值元组
+    """
+    def extract(params: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(map(params.get, keys, defaults))
+    return extract
+
+
+# 多设备相关工具的参数提取函数
+_DEVICE_MESSAGING_ARGS = _make_extractor(("action", "device_id", "message", "timeout"), ("", None, None, 5))
+_SYNC_OPERATIONS_ARGS = _make_extractor(("action", "lock_name", "timeout"), ("", None, 30))
+_DEVICE_GROUP_ACTIONS_ARGS = _make_extractor(("action", "group_name", "device_ids", "command"), ("", None, None, None))
+_SHARE_BETWEEN_DEVICES_ARGS = _make_extractor(
+    ("action", "source_device", "target_device", "device_path", "data_key", "data_value"),
+    ("", None, None, None, None, None)
+)
+
+
+# 工具注册表 [(工具名, 函数, 描述, 输入Schema, 注解, 参数校验函数)]，由@tool装饰器在导入时填充
+_TOOL_REGISTRY: List[Tuple[str, Callable, str, Dict[str, Any], Dict[str, Any], Callable]] = []
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_param_docs(func: Callable) -> Dict[str, str]:
+    """
+    解析函数文档中的参数描述，每个函数只扫描一次
+    
+    Args:
+        func: 函数
+        
+    Returns:
+        参数描述字典 {参数名: 描述}
+    """
+    param_docs = {}
+    for line in (func.__doc__ or "").split("\n"):
+        key, sep, desc = line.strip().partition(":")
+        if sep and key not in param_docs:
+            param_docs[key] = desc.strip()
+    return param_docs
+
+
+def tool(params: Dict[str, Any] = None, required: Tuple[str, ...] = (),
+         read_only: bool = False, destructive: bool = False, name: str = None) -> Callable:
+    """
+    工具注册装饰器，在模块导入时构建并编译Schema，登记到工具注册表
+    
+    Args:
+        params: 参数定义 {参数名: JSON类型名或完整属性Schema}，参数描述取自方法文档
+        required: 必需参数名
+        read_only: 是否为只读工具
+        destructive: 是否为破坏性工具
+        name: 工具名，默认为方法名去掉"tool_"前缀
+        
+    Returns:
+        装饰器
+    """
+    def decorator(func: Callable) -> Callable:
+        docstring = func.__doc__ or ""
+        description = docstring.strip().split("\n")[0] if docstring else ""
+        param_docs = _parse_param_docs(func)
+        
+        properties = {}
+        for param_name, spec in (params or {}).items():
+            param_property = {"type": spec} if isinstance(spec, str) else dict(spec)
+            if param_name in param_docs:
+                param_property["description"] = param_docs[param_name]
+            properties[param_name] = param_property
+            
+        # 构建Schema
+        schema = {
+            "type": "object",
+            "properties": properties
+        }
+        if required:
+            schema["required"] = list(required)
+            
+        # 构建注解
+        annotations = {}
+        if read_only:
+            annotations["readOnlyHint"] = True
+        if destructive:
+            annotations["destructiveHint"] = True
+            
+        tool_name = name or func.__name__[5:]  # 去掉"tool_"前缀
+        validator = fastjsonschema.compile(schema)
+        _TOOL_REGISTRY.append((tool_name, func, description, schema, annotations, validator))
+        return func
+    return decorator
+
 
 class AndroidTools:
     """Android设备控制工具集"""
     
+    # 固定实例属性布局，省去每个实例的__dict__；各控制器通过属性按需创建
+    __slots__ = ("adb_path", "device_id", "_controllers", "_controllers_lock",
+                 "_multi_device_controller", "_tools_cache")
+    
     def __init__(self, adb_path: str = "adb", device_id: str = None):
         """
-        初始化Android工具集
+        初始化Android工具集，控制器在首次使用时才创建
         
         Args:
             adb_path: ADB命令路径
@@ -34,133 +228,137 @@ class AndroidTools:
         self.adb_path = adb_path
         self.device_id = device_id
         
-        # 创建不同功能的控制器
-        self.device_controller = DeviceController(adb_path, device_id)
-        self.app_controller = AppController(adb_path, device_id)
-        self.system_controller = SystemController(adb_path, device_id)
-        self.advanced_controller = AdvancedController(adb_path, device_id)
-        self.multi_device_controller = MultiDeviceController(adb_path, device_id)
-    
-    def create_tools(self) -> List[MCPTool]:
-        """
-        创建MCP工具列表
+        # 按设备缓存的控制器组 {设备ID: [设备, 应用, 系统, 高级功能控制器]}，未使用的控制器为None
+        self._controllers: Dict[Optional[str], List[Optional[DeviceController]]] = {}
+        self._controllers_lock = threading.Lock()
         
-        Returns:
-            MCP工具列表
-        """
-        tools = []
+        # 多设备协作控制器，首次使用多设备工具时创建
+        self._multi_device_controller: Optional[MultiDeviceController] = None
         
-        # 获取所有以"tool_"开头的方法
-        for name, method in inspect.getmembers(self, predicate=inspect.ismethod):
-            if name.startswith("tool_"):
-                tool_name = name[5:]  # 去掉"tool_"前缀
-                
-                # 获取方法信息
-                docstring = method.__doc__ or ""
-                description = docstring.strip().split("\n")[0] if docstring else ""
-                
-                # 构建参数Schema
-                input_schema = self._build_input_schema(method)
-                
-                # 构建注解
-                annotations = {}
-                if "获取" in description or "查询" in description or "列出" in description:
-                    annotations["readOnlyHint"] = True
-                elif "删除" in description or "卸载" in description or "清除" in description:
-                    annotations["destructiveHint"] = True
-                    
-                # 构建工具对象
-                tool = MCPTool(
-                    name=tool_name,
-                    description=description,
-                    handler=method,
-                    input_schema=input_schema,
-                    annotations=annotations
-                )
-                tools.append(tool)
-                
-        return tools
+        # 已创建的MCP工具列表，重复注册时直接复用
+        self._tools_cache: Optional[List[MCPTool]] = None
     
-    def _build_input_schema(self, method: Callable) -> Dict[str, Any]:
+    def _get_controller(self, index: int) -> DeviceController:
         """
-        构建输入参数Schema
+        获取当前设备的指定控制器，首次使用时创建（高级功能控制器含Airtest初始化），之后复用
         
         Args:
-            method: 方法
+            index: 控制器在_CONTROLLER_CLASSES中的下标
             
         Returns:
-            JSON Schema
+            控制器实例
+        """
+        device_id = self.device_id
+        controllers = self._controllers.get(device_id)
+        if controllers is not None:
+            controller = controllers[index]
+            if controller is not None:
+                return controller
+                
+        with self._controllers_lock:
+            controllers = self._controllers.setdefault(device_id, [None] * len(_CONTROLLER_CLASSES))
+            controller = controllers[index]
+            if controller is None:
+                controller = _CONTROLLER_CLASSES[index](self.adb_path, device_id)
+                controllers[index] = controller
+        return controller
+    
+    @property
+    def device_controller(self) -> DeviceController:
+        """当前设备的设备控制器"""
+        return self._get_controller(0)
+    
+    @property
+    def app_controller(self) -> AppController:
+        """当前设备的应用控制器"""
+        return self._get_controller(1)
+    
+    @property
+    def system_controller(self) -> SystemController:
+        """当前设备的系统控制器"""
+        return self._get_controller(2)
+    
+    @property
+    def advanced_controller(self) -> AdvancedController:
+        """当前设备的高级功能控制器"""
+        return self._get_controller(3)
+    
+    @property
+    def multi_device_controller(self) -> MultiDeviceController:
+        """多设备协作控制器"""
+        controller = self._multi_device_controller
+        if controller is None:
+            with self._controllers_lock:
+                controller = self._multi_device_controller
+                if controller is None:
+                    controller = MultiDeviceController(self.adb_path, self.device_id)
+                    self._multi_device_controller = controller
+        return controller
+    
+    def cleanup(self):
+        """
+        清理所有已创建的控制器资源，在服务关闭时调用
+        """
+        controllers = [c for group in list(self._controllers.values()) for c in group if c is not None]
+        if self._multi_device_controller is not None:
+            controllers.append(self._multi_device_controller)
+            
+        for controller in controllers:
+            try:
+                controller.cleanup()
+            except Exception as e:
+                logger.error(f"清理控制器失败: {str(e)}")
+    
+    @classmethod
+    def _compute_tool_specs(cls) -> Tuple[Tuple[str, str, Dict[str, Any], Dict[str, Any], Callable, Callable], ...]:
         """
-        # 获取方法签名
-        sig = inspect.signature(method)
+        获取本类的工具规格，首次调用时按注册表解析一次并缓存在类上，所有实例共享
         
-        properties = {}
-        required = []
+        子类重写的tool_xxx方法会替换注册表中的原函数，Schema沿用注册时的定义。
         
-        # 遍历参数
-        for param_name, param in sig.parameters.items():
-            # 跳过self参数
-            if param_name == "self" or param_name == "params":
-                continue
-                
-            # 确定参数类型
-            if param.annotation == inspect.Parameter.empty:
-                param_type = "string"
-            elif param.annotation == str:
-                param_type = "string"
-            elif param.annotation == int:
-                param_type = "integer"
-            elif param.annotation == float:
-                param_type = "number"
-            elif param.annotation == bool:
-                param_type = "boolean"
-            elif param.annotation == List[str]:
-                param_type = "array"
-                item_type = "string"
-            elif param.annotation == List[int]:
-                param_type = "array"
-                item_type = "integer"
-            else:
-                param_type = "string"
-                
-            # 构建参数属性
-            param_property = {"type": param_type}
-            
-            # 如果是数组，添加items
-            if param_type == "array":
-                param_property["items"] = {"type": item_type}
-                
-            # 添加参数描述
-            if method.__doc__:
-                lines = method.__doc__.strip().split("\n")
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith(param_name + ":"):
-                        param_property["description"] = line.split(":", 1)[1].strip()
-                        break
-                        
-            # 添加属性
-            properties[param_name] = param_property
-            
-            # 如果参数没有默认值，则为必需参数
-            if param.default == inspect.Parameter.empty:
-                required.append(param_name)
-                
-        # 构建Schema
-        schema = {
-            "type": "object",
-            "properties": properties
-        }
+        Returns:
+            工具规格元组 ((工具名, 描述, 输入Schema, 注解, 参数校验函数, 未绑定方法), ...)
+        """
+        specs = cls.__dict__.get("_TOOL_SPECS")
+        if specs is None:
+            specs = tuple(
+                (tool_name, description, input_schema, annotations, validator,
+                 getattr(cls, func.__name__))
+                for tool_name, func, description, input_schema, annotations, validator in _TOOL_REGISTRY
+            )
+            cls._TOOL_SPECS = specs
+        return specs
+    
+    def create_tools(self) -> List[MCPTool]:
+        """
+        创建MCP工具列表
         
-        if required:
-            schema["required"] = required
+        Returns:
+            MCP工具列表
+        """
+        if self._tools_cache is not None:
+            return self._tools_cache
             
-        return schema
+        # 规格已按类缓存，这里只需将未绑定方法直接绑定到当前实例
+        self._tools_cache = [
+            MCPTool(
+                name=tool_name,
+                description=description,
+                handler=MethodType(method, self),
+                input_schema=input_schema,
+                annotations=annotations,
+                validator=validator
+            )
+            for tool_name, description, input_schema, annotations, validator, method
+            in self._compute_tool_specs()
+        ]
+        return self._tools_cache
     
     # 以下是工具方法，按功能分组
     
     # 屏幕操作相关工具
     
+    @tool(read_only=True)
     def tool_get_screen_size(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         获取屏幕尺寸
@@ -174,6 +372,7 @@ class AndroidTools:
             "height": height
         }
     
+    @tool(params={"resize_ratio": "number"}, read_only=True)
     def tool_take_screenshot(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         截取屏幕截图
@@ -185,7 +384,7 @@ class AndroidTools:
             截图文件路径
         """
         resize_ratio = params.get("resize_ratio", 0.5)
-        screenshot_path = self.device_controller.get_screenshot(resize_ratio=float(resize_ratio))
+        screenshot_path = self.device_controller.get_screenshot(resize_ratio=resize_ratio)
         
         # 构建URL路径
         file_name = os.path.basename(screenshot_path)
@@ -196,6 +395,8 @@ class AndroidTools:
             "url": url_path
         }
     
+    @tool(params={"x": "number", "y": "number", "is_percent": "boolean"},
+          required=("x", "y"))
     def tool_tap_screen(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         点击屏幕
@@ -208,13 +409,15 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        x = params.get("x")
-        y = params.get("y")
+        x = params["x"]
+        y = params["y"]
         is_percent = params.get("is_percent", True)
         
-        success = self.device_controller.tap(float(x), float(y), bool(is_percent))
-        return {"success": success}
+        success = self.device_controller.tap(x, y, is_percent)
+        return _OK if success else _FAIL
     
+    @tool(params={"x": "number", "y": "number", "duration": "integer", "is_percent": "boolean"},
+          required=("x", "y"))
     def tool_long_press(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         长按屏幕
@@ -228,16 +431,19 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        x = params.get("x")
-        y = params.get("y")
+        x = params["x"]
+        y = params["y"]
         duration = params.get("duration", 1000)
         is_percent = params.get("is_percent", True)
         
         success = self.device_controller.long_press(
-            float(x), float(y), int(duration), bool(is_percent)
+            x, y, int(duration), is_percent
         )
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"x1": "number", "y1": "number", "x2": "number", "y2": "number",
+                  "duration": "integer", "is_percent": "boolean"},
+          required=("x1", "y1", "x2", "y2"))
     def tool_swipe(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         滑动屏幕
@@ -253,18 +459,22 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        x1 = params.get("x1")
-        y1 = params.get("y1")
-        x2 = params.get("x2")
-        y2 = params.get("y2")
+        x1 = params["x1"]
+        y1 = params["y1"]
+        x2 = params["x2"]
+        y2 = params["y2"]
         duration = params.get("duration", 500)
         is_percent = params.get("is_percent", True)
         
         success = self.device_controller.swipe(
-            float(x1), float(y1), float(x2), float(y2), int(duration), bool(is_percent)
+            x1, y1, x2, y2, int(duration), is_percent
         )
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"points": {"type": "array", "items": {"type": "array", "items": {"type": "number"},
+                                                     "minItems": 2, "maxItems": 2}},
+                  "is_percent": "boolean"},
+          required=("points",))
     def tool_multi_touch(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         多点触控操作
@@ -276,15 +486,16 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        points = params.get("points", [])
+        points = params["points"]
         is_percent = params.get("is_percent", True)
         
-        # 将points列表转换为元组列表
-        points_tuples = [(float(p[0]), float(p[1])) for p in points]
-        
-        success = self.device_controller.multi_touch(points_tuples, bool(is_percent))
-        return {"success": success}
+        # Schema已保证每个点为[x, y]数值对，可直接交给控制器解包
+        success = self.device_controller.multi_touch(points, is_percent)
+        return _OK if success else _FAIL
     
+    @tool(params={"center_x": "number", "center_y": "number", "start_distance": "number",
+                  "end_distance": "number", "duration": "integer", "is_percent": "boolean"},
+          required=("center_x", "center_y", "start_distance", "end_distance"))
     def tool_pinch(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         双指缩放操作
@@ -300,20 +511,23 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        center_x = params.get("center_x")
-        center_y = params.get("center_y")
-        start_distance = params.get("start_distance")
-        end_distance = params.get("end_distance")
+        center_x = params["center_x"]
+        center_y = params["center_y"]
+        start_distance = params["start_distance"]
+        end_distance = params["end_distance"]
         duration = params.get("duration", 500)
         is_percent = params.get("is_percent", True)
         
         success = self.device_controller.pinch(
-            float(center_x), float(center_y),
-            float(start_distance), float(end_distance),
-            int(duration), bool(is_percent)
+            center_x, center_y,
+            start_distance, end_distance,
+            int(duration), is_percent
         )
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"direction": {"type": "string", "enum": ["up", "down"]},
+                  "distance_percent": "number", "duration": "integer"},
+          required=("direction",))
     def tool_slide_screen(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         向上/向下滑动屏幕
@@ -330,17 +544,35 @@ class AndroidTools:
         distance_percent = params.get("distance_percent", 0.3)
         duration = params.get("duration", 500)
         
-        if direction == "up":
-            success = self.device_controller.slide_up(float(distance_percent), int(duration))
-        elif direction == "down":
-            success = self.device_controller.slide_down(float(distance_percent), int(duration))
-        else:
-            return {"success": False, "error": "无效的滑动方向，应为up或down"}
-            
-        return {"success": success}
-    
+        slide = _SLIDE_DISPATCH.get(direction)
+        if slide is None:
+            return _INVALID_SLIDE_DIRECTION_ERR
+
+        success = slide(self.device_controller, distance_percent, int(duration))
+        return _OK if success else _FAIL
+
+    @tool(params={"steps": {"type": "array", "items": _GESTURE_STEP_SCHEMA}, "is_percent": "boolean"},
+          required=("steps",))
+    def tool_run_gesture_script(self, params: Dict[str, Any]) -> Dict[str, bool]:
+        """
+        批量执行点击/滑动脚本
+
+        Args:
+            steps: 步骤列表，每步如{"action": "tap", "x": 0.2, "y": 0.6, "delay_ms": 500}
+            is_percent: 坐标是否为屏幕百分比，默认True
+
+        Returns:
+            操作结果
+        """
+        steps = params.get("steps", [])
+        is_percent = params.get("is_percent", True)
+
+        success = self.device_controller.run_gesture_script(steps, is_percent)
+        return _OK if success else _FAIL
+
     # 设备控制相关工具
     
+    @tool()
     def tool_press_back(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         点击返回键
@@ -349,8 +581,9 @@ class AndroidTools:
             操作结果
         """
         success = self.device_controller.press_back()
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool()
     def tool_go_to_home(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         返回桌面
@@ -359,8 +592,9 @@ class AndroidTools:
             操作结果
         """
         success = self.device_controller.go_to_home()
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool()
     def tool_press_power(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         按下电源键
@@ -369,8 +603,9 @@ class AndroidTools:
             操作结果
         """
         success = self.device_controller.press_power()
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool()
     def tool_unlock_screen(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         解锁屏幕
@@ -379,8 +614,10 @@ class AndroidTools:
             操作结果
         """
         success = self.device_controller.unlock_screen()
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"volume_type": "string", "level": "integer",
+                  "direction": {"type": "string", "enum": ["up", "down"]}})
     def tool_adjust_volume(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         调节音量
@@ -407,6 +644,7 @@ class AndroidTools:
             "current_volume": current_volume
         }
     
+    @tool(params={"orientation": {"type": "integer", "enum": [0, 1, 2, 3, 4]}})
     def tool_rotate_screen(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         控制屏幕旋转
@@ -424,8 +662,9 @@ class AndroidTools:
         """
         orientation = params.get("orientation", 0)
         success = self.device_controller.rotate_screen(int(orientation))
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"level": "integer", "auto_mode": "boolean"})
     def tool_set_brightness(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         设置屏幕亮度
@@ -440,9 +679,10 @@ class AndroidTools:
         level = params.get("level", 50)
         auto_mode = params.get("auto_mode", False)
         
-        success = self.device_controller.set_brightness(int(level), bool(auto_mode))
-        return {"success": success}
+        success = self.device_controller.set_brightness(int(level), auto_mode)
+        return _OK if success else _FAIL
     
+    @tool(params={"keycode": "integer"}, required=("keycode",))
     def tool_keyevent(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         发送按键事件
@@ -455,10 +695,11 @@ class AndroidTools:
         """
         keycode = params.get("keycode")
         success = self.device_controller.keyevent(int(keycode))
-        return {"success": success}
+        return _OK if success else _FAIL
     
     # 文本输入相关工具
     
+    @tool(params={"text": "string"}, required=("text",))
     def tool_type_text(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         输入文本
@@ -471,8 +712,9 @@ class AndroidTools:
         """
         text = params.get("text")
         success = self.device_controller.type_text(text)
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"ime_id": "string"})
     def tool_switch_ime(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         切换输入法
@@ -491,6 +733,7 @@ class AndroidTools:
         else:
             return {"success": result}
     
+    @tool()
     def tool_paste_text(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         粘贴文本
@@ -499,8 +742,9 @@ class AndroidTools:
             操作结果
         """
         success = self.device_controller.paste_text()
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"char_count": "integer"}, destructive=True)
     def tool_clear_text(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         清除文本
@@ -516,10 +760,11 @@ class AndroidTools:
             char_count = int(char_count)
             
         success = self.device_controller.clear_text(char_count)
-        return {"success": success}
+        return _OK if success else _FAIL
     
     # 应用管理相关工具
     
+    @tool(params={"package_name": "string", "activity_name": "string"}, required=("package_name",))
     def tool_start_app(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         启动应用
@@ -534,8 +779,9 @@ class AndroidTools:
         package_name = params.get("package_name")
         activity_name = params.get("activity_name", None)
         success = self.app_controller.start_app(package_name, activity_name)
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"package_name": "string"}, required=("package_name",))
     def tool_stop_app(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         停止应用
@@ -548,8 +794,10 @@ class AndroidTools:
         """
         package_name = params.get("package_name")
         success = self.app_controller.stop_app(package_name)
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"system_apps": "boolean", "third_party_apps": "boolean", "with_names": "boolean"},
+          read_only=True)
     def tool_list_apps(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         列出已安装应用
@@ -557,16 +805,21 @@ class AndroidTools:
         Args:
             system_apps: 是否包含系统应用，默认False
             third_party_apps: 是否包含第三方应用，默认True
+            with_names: 是否查询应用显示名称，默认True；仅需包名时传False可省去逐个dumpsys
             
         Returns:
             应用列表
         """
         system_apps = params.get("system_apps", False)
         third_party_apps = params.get("third_party_apps", True)
+        with_names = params.get("with_names", True)
         
-        app_list = self.app_controller.list_apps(bool(system_apps), bool(third_party_apps))
+        app_list = self.app_controller.list_apps(
+            system_apps, third_party_apps, with_names
+        )
         return {"apps": app_list}
     
+    @tool(params={"url": "string"}, required=("url",))
     def tool_open_url(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         打开网址
@@ -579,8 +832,9 @@ class AndroidTools:
         """
         url = params.get("url")
         success = self.app_controller.open_url(url)
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(read_only=True)
     def tool_get_current_app(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         获取前台应用信息
@@ -591,6 +845,7 @@ class AndroidTools:
         app_info = self.app_controller.get_current_app()
         return app_info
     
+    @tool(params={"package_name": "string"}, required=("package_name",), read_only=True)
     def tool_check_app_installed(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         检查应用是否已安装
@@ -605,6 +860,7 @@ class AndroidTools:
         installed = self.app_controller.check_app_installed(package_name)
         return {"installed": installed}
     
+    @tool(params={"package_name": "string", "timeout": "integer"}, required=("package_name",))
     def tool_monitor_app_start(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         监控应用启动
@@ -620,10 +876,11 @@ class AndroidTools:
         timeout = params.get("timeout", 30)
         
         success = self.app_controller.monitor_app_start(package_name, int(timeout))
-        return {"success": success}
+        return _OK if success else _FAIL
     
     # 设备信息相关工具
     
+    @tool(read_only=True)
     def tool_get_device_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         获取设备信息
@@ -633,6 +890,7 @@ class AndroidTools:
         """
         return self.device_controller.get_device_info()
     
+    @tool(read_only=True)
     def tool_list_devices(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         列出已连接设备
@@ -643,6 +901,7 @@ class AndroidTools:
         devices = self.system_controller.list_devices()
         return {"devices": devices}
     
+    @tool(read_only=True)
     def tool_get_battery_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         获取设备电量信息
@@ -652,6 +911,7 @@ class AndroidTools:
         """
         return self.system_controller.get_battery_info()
     
+    @tool(read_only=True)
     def tool_get_storage_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         获取设备存储信息
@@ -663,6 +923,8 @@ class AndroidTools:
     
     # 高级功能相关工具
     
+    @tool(params={"command": "string", "timeout": "integer"}, required=("command",),
+          destructive=True)
     def tool_execute_shell(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行Shell命令
@@ -683,28 +945,42 @@ class AndroidTools:
             "success": success
         }
     
+    @tool(params={"target_image_path": "string", "target_image_b64": "string",
+                  "target_image_hash": "string", "threshold": "number",
+                  "timeout": "integer", "save_screenshot": "boolean"},
+          read_only=True)
     def tool_image_recognition(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         图像识别与匹配
         
         Args:
             target_image_path: 目标图像路径
+            target_image_b64: base64编码的目标图像数据，可替代target_image_path
+            target_image_hash: 目标图像内容的MD5，服务端据此缓存已解码的模板
             threshold: 匹配阈值，默认0.7
             timeout: 超时时间(秒)，默认10
+            save_screenshot: 是否返回匹配时使用的截图，默认False
             
         Returns:
             匹配结果
         """
         target_image_path = params.get("target_image_path")
+        target_image_b64 = params.get("target_image_b64")
+        target_image_hash = params.get("target_image_hash")
         threshold = params.get("threshold", 0.7)
         timeout = params.get("timeout", 10)
+        save_screenshot = params.get("save_screenshot", False)
+        
+        if not target_image_path and not target_image_b64:
+            raise MCPError("无效的工具参数: 需要提供target_image_path或target_image_b64", -32602)
         
         result = self.advanced_controller.image_recognition(
-            target_image_path, float(threshold), int(timeout)
+            target_image_path, threshold, int(timeout), save_screenshot,
+            target_image_b64, target_image_hash
         )
         
         if result:
-            return {
+            response = {
                 "found": True,
                 "position": {
                     "x": result["x"],
@@ -712,9 +988,18 @@ class AndroidTools:
                 },
                 "confidence": result["confidence"]
             }
+            if "screenshot_path" in result:
+                screenshot_path = result["screenshot_path"]
+                response["screenshot"] = {
+                    "path": screenshot_path,
+                    "url": f"/static/screenshot/{os.path.basename(screenshot_path)}"
+                }
+            return response
         else:
             return {"found": False}
     
+    @tool(params={"language": "string", "region": {"type": "array", "items": {"type": "number"}}},
+          read_only=True)
     def tool_ocr_recognition(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         OCR文字识别
@@ -732,6 +1017,8 @@ class AndroidTools:
         result = self.advanced_controller.ocr_recognition(language, region)
         return result
     
+    @tool(params={"log_type": "string", "lines": {"type": "integer", "minimum": 1}, "package": "string"},
+          read_only=True)
     def tool_capture_logs(self, params: Dict[str, Any]) -> Dict[str, str]:
         """
         截取系统日志
@@ -751,6 +1038,7 @@ class AndroidTools:
         logs = self.advanced_controller.capture_logs(log_type, int(lines), package)
         return {"logs": logs}
     
+    @tool()
     def tool_wake_device(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         唤醒设备
@@ -759,8 +1047,9 @@ class AndroidTools:
             操作结果
         """
         success = self.advanced_controller.wake_device()
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool()
     def tool_sleep_device(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         休眠设备
@@ -769,8 +1058,10 @@ class AndroidTools:
             操作结果
         """
         success = self.advanced_controller.sleep_device()
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"package_name": "string", "max_depth": "integer", "max_actions": "integer"},
+          required=("package_name",))
     def tool_explore_app(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         探索应用界面
@@ -790,6 +1081,10 @@ class AndroidTools:
         result = self.advanced_controller.explore_app(package_name, int(max_depth), int(max_actions))
         return result
     
+    @tool(params={"operation": {"type": "string", "enum": ["push", "pull"]},
+                  "local_path": "string", "device_path": "string"},
+          required=("operation", "local_path", "device_path"),
+          destructive=True)
     def tool_file_operations(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         文件操作(上传/下载)
@@ -809,6 +1104,7 @@ class AndroidTools:
         result = self.advanced_controller.file_operations(operation, local_path, device_path)
         return result
     
+    @tool(read_only=True)
     def tool_check_root(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         检测设备是否已root
@@ -819,6 +1115,7 @@ class AndroidTools:
         result = self.advanced_controller.check_root()
         return result
     
+    @tool(params={"ip_address": "string", "port": "integer"}, required=("ip_address",))
     def tool_connect_over_tcp(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         通过TCP/IP连接设备
@@ -836,6 +1133,8 @@ class AndroidTools:
         result = self.advanced_controller.connect_over_tcp(ip_address, int(port))
         return result
         
+    @tool(params={"package_name": "string", "duration": "integer", "interval": "number"},
+          read_only=True)
     def tool_monitor_performance(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         监控设备性能
@@ -852,9 +1151,10 @@ class AndroidTools:
         duration = params.get("duration", 10)
         interval = params.get("interval", 1.0)
         
-        result = self.advanced_controller.monitor_performance(package_name, int(duration), float(interval))
+        result = self.advanced_controller.monitor_performance(package_name, int(duration), interval)
         return result
     
+    @tool(params={"start": "boolean", "interval": "number"})
     def tool_screenshot_watcher(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         设备截屏监听器
@@ -869,9 +1169,12 @@ class AndroidTools:
         start = params.get("start", True)
         interval = params.get("interval", 2.0)
         
-        result = self.advanced_controller.screenshot_watcher(bool(start), float(interval))
+        result = self.advanced_controller.screenshot_watcher(start, interval)
         return result
     
+    @tool(params={"action": {"type": "string", "enum": ["start_record", "stop_record", "replay"]},
+                  "script_path": "string", "record_duration": "integer"},
+          required=("action",))
     def tool_record_and_replay(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         脚本录制和回放
@@ -891,6 +1194,7 @@ class AndroidTools:
         result = self.advanced_controller.record_and_replay(action, script_path, int(record_duration))
         return result
     
+    @tool(params={"test_path": "string", "test_type": "string"}, required=("test_path",))
     def tool_run_test_case(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         执行自动化测试用例
@@ -908,83 +1212,83 @@ class AndroidTools:
         result = self.advanced_controller.run_test_case(test_path, test_type)
         return result
         
-    def tool_multi_device_management(self, params: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        多设备管理与操作
+    def _list_devices_action(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """列出所有设备"""
+        devices = self.system_controller.list_devices()
+        return {"devices": devices}
+    
+    def _switch_device_action(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """切换当前控制的设备"""
+        device_id = params.get("device_id", "")
         
-        Args:
-            action: 操作类型，list(列出设备)、switch(切换设备)、execute(在多设备上执行命令)
-            device_ids: 设备ID列表，在execute操作时使用
-            device_id: 设备ID，在switch操作时使用
-            command: 要执行的命令，在execute操作时使用
-            
-        Returns:
-            操作结果
-        """
-        action = params.get("action", "list")
+        if not device_id:
+            return {
+                "success": False,
+                "message": "未指定设备ID"
+            }
+        
+        # 验证设备是否存在
+        devices = self.system_controller.list_devices()
+        device_exists = any(d.get("id") == device_id for d in devices)
+        
+        if not device_exists:
+            return {
+                "success": False,
+                "message": f"设备 {device_id} 不存在或未连接"
+            }
+        
+        # 切换到该设备的控制器组，已创建过的直接复用；已初始化的Airtest只需切换当前设备，
+        # 尚未创建的高级功能控制器会在首次使用时完成初始化
+        controllers = self._controllers.get(device_id)
+        if controllers is not None and controllers[3] is not None:
+            controllers[3].activate_airtest()
+        self.device_id = device_id
+        
+        return {
+            "success": True,
+            "message": f"已切换到设备 {device_id}"
+        }
+    
+    def _execute_on_devices_action(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """在多设备上执行命令"""
         device_ids = params.get("device_ids", [])
-        device_id = params.get("device_id", "")
         command = params.get("command", "")
         
-        # 列出所有设备
-        if action == "list":
-            devices = self.system_controller.list_devices()
-            return {"devices": devices}
-            
-        # 切换当前控制的设备
-        elif action == "switch":
-            if not device_id:
-                return {
-                    "success": False,
-                    "message": "未指定设备ID"
-                }
-                
-            # 验证设备是否存在
-            devices = self.system_controller.list_devices()
-            device_exists = any(d.get("id") == device_id for d in devices)
-            
-            if not device_exists:
-                return {
-                    "success": False,
-                    "message": f"设备 {device_id} 不存在或未连接"
-                }
-                
-            # 更新控制器的设备ID
-            self.device_controller.device_id = device_id
-            self.app_controller.device_id = device_id
-            self.system_controller.device_id = device_id
-            self.advanced_controller.device_id = device_id
-            
-            # 重新初始化Airtest连接
-            self.advanced_controller.init_airtest()
-            
+        if not device_ids:
             return {
-                "success": True,
-                "message": f"已切换到设备 {device_id}"
+                "success": False,
+                "message": "未指定设备ID列表"
             }
-            
-        # 在多设备上执行命令
-        elif action == "execute":
-            if not device_ids:
-                return {
-                    "success": False,
-                    "message": "未指定设备ID列表"
-                }
-                
-            if not command:
-                return {
-                    "success": False,
-                    "message": "未指定要执行的命令"
-                }
-                
-            # 执行命令
+        
+        if not command:
+            return {
+                "success": False,
+                "message": "未指定要执行的命令"
+            }
+        
+        # 构建各设备的ADB命令参数，不经过shell解析
+        try:
+            cmd_args = shlex.split(command)
+        except ValueError as e:
+            return {
+                "success": False,
+                "message": f"命令解析失败: {str(e)}"
+            }
+        
+        # 各设备的ADB调用互不依赖，并行执行
+        with ThreadPoolExecutor(max_workers=min(MULTI_DEVICE_MAX_WORKERS, len(device_ids))) as pool:
+            futures = [
+                pool.submit(
+                    subprocess.run, [self.adb_path, "-s", dev_id] + cmd_args,
+                    capture_output=True, text=True, timeout=MULTI_DEVICE_CMD_TIMEOUT
+                )
+                for dev_id in device_ids
+            ]
+        
             results = []
-            for dev_id in device_ids:
-                # 构建特定设备的ADB命令
-                cmd = f"{self.adb_path} -s {dev_id} {command}"
-                
+            for dev_id, future in zip(device_ids, futures):
                 try:
-                    proc = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+                    proc = future.result()
                     results.append({
                         "device_id": dev_id,
                         "success": proc.returncode == 0,
@@ -997,17 +1301,46 @@ class AndroidTools:
                         "success": False,
                         "error": str(e)
                     })
+        
+        return {
+            "success": True,
+            "results": results
+        }
+    
+    # 多设备管理操作分派表 {操作类型: 处理方法}
+    _MULTI_DEVICE_ACTIONS = {
+        "list": _list_devices_action,
+        "switch": _switch_device_action,
+        "execute": _execute_on_devices_action
+    }
+    
+    @tool(params={"action": {"type": "string", "enum": ["list", "switch", "execute"]},
+                  "device_ids": {"type": "array", "items": {"type": "string"}},
+                  "device_id": "string", "command": "string"})
+    def tool_multi_device_management(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        多设备管理与操作
+        
+        Args:
+            action: 操作类型，list(列出设备)、switch(切换设备)、execute(在多设备上执行命令)
+            device_ids: 设备ID列表，在execute操作时使用
+            device_id: 设备ID，在switch操作时使用
+            command: 要执行的命令，在execute操作时使用
             
-            return {
-                "success": True,
-                "results": results
-            }
-        else:
+        Returns:
+            操作结果
+        """
+        action = params.get("action", "list")
+        
+        handler = self._MULTI_DEVICE_ACTIONS.get(action)
+        if handler is None:
             return {
                 "success": False,
                 "message": f"不支持的操作类型: {action}"
             }
-        
+        return handler(self, params)
+    
+    @tool(params={"enable": {"type": ["boolean", "string", "integer"]}})
     def tool_toggle_wifi(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         设置WiFi开关
@@ -1018,12 +1351,12 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        enable = params.get("enable", True)
-        enable = enable if isinstance(enable, bool) else (str(enable).lower() == "true")
+        enable = _get_enable(params)
         
         success = self.system_controller.toggle_wifi(enable)
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"enable": {"type": ["boolean", "string", "integer"]}})
     def tool_toggle_bluetooth(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         设置蓝牙开关
@@ -1034,12 +1367,12 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        enable = params.get("enable", True)
-        enable = enable if isinstance(enable, bool) else (str(enable).lower() == "true")
+        enable = _get_enable(params)
         
         success = self.system_controller.toggle_bluetooth(enable)
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"enable": {"type": ["boolean", "string", "integer"]}})
     def tool_toggle_mobile_data(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         设置移动数据开关
@@ -1050,12 +1383,12 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        enable = params.get("enable", True)
-        enable = enable if isinstance(enable, bool) else (str(enable).lower() == "true")
+        enable = _get_enable(params)
         
         success = self.system_controller.toggle_mobile_data(enable)
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"enable": {"type": ["boolean", "string", "integer"]}})
     def tool_toggle_airplane_mode(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         设置飞行模式
@@ -1066,12 +1399,14 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        enable = params.get("enable", True)
-        enable = enable if isinstance(enable, bool) else (str(enable).lower() == "true")
+        enable = _get_enable(params)
         
         success = self.system_controller.toggle_airplane_mode(enable)
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"ssid": "string", "password": "string",
+                  "security_type": {"type": "string", "enum": ["NONE", "WEP", "WPA", "WPA2"]}},
+          required=("ssid",))
     def tool_connect_wifi(self, params: Dict[str, Any]) -> Dict[str, bool]:
         """
         连接到指定WiFi
@@ -1089,22 +1424,30 @@ class AndroidTools:
         security_type = params.get("security_type", "WPA")
         
         if not ssid:
-            return {"success": False, "message": "WiFi名称不能为空"}
+            return _EMPTY_SSID_ERR
             
         success = self.system_controller.connect_wifi(ssid, password, security_type)
-        return {"success": success}
+        return _OK if success else _FAIL
     
+    @tool(params={"no_cache": "boolean"}, read_only=True)
     def tool_get_wifi_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         获取当前WiFi详细信息
         
+        Args:
+            no_cache: 为True时忽略1秒内的缓存结果，重新查询设备
+            
         Returns:
             WiFi信息 {ssid, bssid, rssi, ip_address, link_speed, frequency}
         """
-        wifi_info = self.system_controller.get_wifi_info()
+        wifi_info = self.system_controller.get_wifi_info(not params.get("no_cache", False))
         return wifi_info
     
-    def tool_device_messaging(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    @tool(params={"action": {"type": "string", "enum": ["send", "receive", "clear"]},
+                  "device_id": "string", "message": "string",
+                  "timeout": {"type": "integer", "default": 5}},
+          required=("action",))
+    async def tool_device_messaging(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         设备间消息传递
         
@@ -1117,16 +1460,15 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        action = params.get("action", "")
-        device_id = params.get("device_id", None)
-        message = params.get("message", None)
-        timeout = params.get("timeout", 5)
+        action, device_id, message, timeout = _DEVICE_MESSAGING_ARGS(params)
         
-        return self.multi_device_controller.device_messaging(
-            action, device_id, message, int(timeout)
-        )
+        # timeout已由Schema校验为整数，直接传递
+        return await self.multi_device_controller.device_messaging(action, device_id, message, timeout)
     
-    def tool_sync_operations(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    @tool(params={"action": {"type": "string", "enum": ["create", "wait", "set", "release"]},
+                  "lock_name": "string", "timeout": {"type": "integer", "default": 30}},
+          required=("action",))
+    async def tool_sync_operations(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         多设备同步操作
         
@@ -1138,14 +1480,16 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        action = params.get("action", "")
-        lock_name = params.get("lock_name", None)
-        timeout = params.get("timeout", 30)
+        action, lock_name, timeout = _SYNC_OPERATIONS_ARGS(params)
         
-        return self.multi_device_controller.sync_operations(
-            action, lock_name, int(timeout)
-        )
+        # timeout已由Schema校验为整数，直接传递
+        return await self.multi_device_controller.sync_operations(action, lock_name, timeout)
     
+    @tool(params={"action": {"type": "string", "enum": ["create", "list", "execute", "delete"]},
+                  "group_name": "string",
+                  "device_ids": {"type": ["array", "string"], "items": {"type": "string"}},
+                  "command": "string"},
+          required=("action",))
     def tool_device_group_actions(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         设备组操作
@@ -1159,22 +1503,27 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        action = params.get("action", "")
-        group_name = params.get("group_name", None)
-        device_ids = params.get("device_ids", [])
-        command = params.get("command", None)
+        action, group_name, device_ids, command = _DEVICE_GROUP_ACTIONS_ARGS(params)
         
-        # 确保device_ids是列表
+        # 确保device_ids是列表，只有形如JSON数组的字符串才需要解析
         if isinstance(device_ids, str):
-            try:
-                device_ids = json.loads(device_ids)
-            except:
+            text = device_ids.lstrip()
+            if text[:1] == "[":
+                try:
+                    device_ids = json.loads(text)
+                except json.JSONDecodeError:
+                    device_ids = [device_ids]
+            else:
                 device_ids = [device_ids]
                 
         return self.multi_device_controller.device_group_actions(
             action, group_name, device_ids, command
         )
     
+    @tool(params={"action": {"type": "string", "enum": ["copy_file", "share_data", "get_data"]},
+                  "source_device": "string", "target_device": "string", "device_path": "string",
+                  "data_key": "string", "data_value": {}},
+          required=("action",))
     def tool_share_between_devices(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         设备间文件共享
@@ -1190,15 +1539,13 @@ class AndroidTools:
         Returns:
             操作结果
         """
-        action = params.get("action", "")
-        source_device = params.get("source_device", None)
-        target_device = params.get("target_device", None)
-        device_path = params.get("device_path", None)
-        data_key = params.get("data_key", None)
-        data_value = params.get("data_value", None)
+        action, source_device, target_device, device_path, data_key, data_value = \
+            _SHARE_BETWEEN_DEVICES_ARGS(params)
         
+        # local_path不对外开放，由控制器使用默认值
         return self.multi_device_controller.share_between_devices(
-            action, source_device, target_device, None, device_path, data_key, data_value
+            action, source_device, target_device,
+            device_path=device_path, data_key=data_key, data_value=data_value
         )
 
 def register_android_tools(server, adb_path: str = "adb", device_id: str = None):
@@ -1213,14 +1560,17 @@ def register_android_tools(server, adb_path: str = "adb", device_id: str = None)
     # 创建工具实例
     android_tools = AndroidTools(adb_path, device_id)
     
-    # 注册控制器到服务器，用于资源清理
-    if hasattr(server, "register_controller"):
-        server.register_controller(android_tools.device_controller)
-        server.register_controller(android_tools.app_controller)
-        server.register_controller(android_tools.system_controller)
-        server.register_controller(android_tools.advanced_controller)
-        server.register_controller(android_tools.multi_device_controller)
-    
-    # 注册工具
-    for tool in android_tools.create_tools():
-        server.register_tool(tool) 
\ No newline at end of file
+    # 注册到服务器，用于资源清理（包含切换设备后创建的控制器）
+    register_controller = getattr(server, "register_controller", None)
+    if register_controller is not None:
+        register_controller(android_tools)
+    
+    # 注册工具，服务器支持批量注册时一次完成
+    tools = android_tools.create_tools()
+    register_tools = getattr(server, "register_tools", None)
+    if register_tools is not None:
+        register_tools(tools)
+    else:
+        register_tool = server.register_tool
+        for tool in tools:
+            register_tool(tool) 
\ No newline at end of file